@@ -2,19 +2,24 @@
 核心图算法处理模块
 
 包含：
-1. 一度 / 二度好友网络发现 (基于自定义封装邻接表)
+1. 一度 / 二度好友网络发现 (基于自定义封装邻接表，二度人脉支持按共同好友数排序的游标分页)
 2. 社交距离探测计算 (限制深度的广度优先遍历)
-3. 智能推荐引擎 (交并比计算 + 最小堆过滤)
+3. 智能推荐引擎 (单次两跳遍历的链路预测特征 + 可配置权重 + 最小堆过滤)
 """
 
 import sys
 import os
+import math
+import heapq
 from collections import deque
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data_structure.heap import MinHeap
+from data_structure.id_registry import uid_sort_key
+from utils.profiler import instrument
 
 
+@instrument()
 def get_first_degree(graph, user_id):
     """
     获取一度人脉 (直接相连的邻居节点)
@@ -29,6 +34,7 @@ def get_first_degree(graph, user_id):
     return graph.get_neighbors(user_id)
 
 
+@instrument()
 def get_second_degree(graph, user_id):
     """
     获取二度人脉 (好友的好友)
@@ -44,6 +50,7 @@ def get_second_degree(graph, user_id):
     return [uid for uid, _ in get_second_degree_with_paths(graph, user_id)]
 
 
+@instrument()
 def get_second_degree_with_paths(graph, user_id):
     """
     获取二度人脉及其与目标用户的连接路径。
@@ -73,17 +80,91 @@ def get_second_degree_with_paths(graph, user_id):
                 elif next_depth < 2:
                     queue.append((neighbor, next_depth, next_path))
 
-    def _sort_uid(item):
-        uid = item[0]
-        uid_str = str(uid)
-        if uid_str.isdigit():
-            return (0, int(uid_str))
-        return (1, uid_str)
-
-    second_with_paths.sort(key=_sort_uid)
+    second_with_paths.sort(key=lambda item: uid_sort_key(item[0]))
     return second_with_paths
 
 
+@instrument()
+def mutual_friend_counts(graph, user_id):
+    """
+    一次遍历统计每位二度人脉与目标之间的共同好友 (中间人) 数量
+
+    与 get_second_degree_with_paths 只保留首条路径不同，这里每位一度好友都会为其邻居计数一次。
+
+    Returns:
+        dict: {二度人脉ID: 共同好友数}
+    """
+    first = graph.get_neighbors(user_id)
+    first_set = set(first)
+    counts = {}
+    for m in first:
+        for c in graph.get_neighbors(m):
+            if c == user_id or c in first_set:
+                continue
+            counts[c] = counts.get(c, 0) + 1
+    return counts
+
+
+@instrument()
+def second_degree_page(graph, user_id, cursor=None, limit=20, counts=None):
+    """
+    按共同好友数降序 (同数按用户ID升序) 分页获取二度人脉
+
+    每页只从计数字典中选出 limit 条，全量结果从不排序或展开；
+    中间人列表也只为当前页的用户计算。
+
+    Args:
+        graph (Graph): 无向图邻接表实例
+        user_id (str): 目标查询节点ID
+        cursor (tuple): 上一页返回的游标 (共同好友数, 用户ID)，缺省为第一页
+        limit (int): 每页条数
+        counts (dict): 可选，mutual_friend_counts 已算出的计数，翻页时复用以免重复遍历
+
+    Returns:
+        tuple[list, tuple | None]: ([(二度人脉ID, 共同好友数, [共同好友ID, ...]), ...], 下一页游标)；
+                                   已是最后一页时游标为 None
+    """
+    if counts is None:
+        counts = mutual_friend_counts(graph, user_id)
+
+    def order(item):
+        return (-item[1], uid_sort_key(item[0]))
+
+    items = counts.items()
+    if cursor is not None:
+        bound = (-cursor[0], uid_sort_key(cursor[1]))
+        items = (item for item in items if order(item) > bound)
+    top = heapq.nsmallest(limit + 1, items, key=order)
+    has_more = len(top) > limit
+    top = top[:limit]
+
+    first_set = set(graph.get_neighbors(user_id))
+    page = [(c, n, [m for m in graph.get_neighbors(c) if m in first_set]) for c, n in top]
+    next_cursor = (top[-1][1], top[-1][0]) if has_more else None
+    return page, next_cursor
+
+
+def format_cursor(cursor):
+    """将分页游标编码为 '共同好友数:用户ID' 字符串，供命令行与 HTTP 接口传递"""
+    return f"{cursor[0]}:{cursor[1]}" if cursor else ""
+
+
+def parse_cursor(text):
+    """
+    format_cursor 的逆操作
+
+    Raises:
+        ValueError: 游标格式错误
+    """
+    if not text:
+        return None
+    count, sep, uid = text.partition(":")
+    if not sep or not uid or not count.isdigit():
+        raise ValueError(f"非法的分页游标: {text}")
+    return int(count), uid
+
+
+@instrument()
 def shortest_distance(graph, start, end):
     """
     基于 BFS 广度优先搜索计算两人间的最短距离与路径
@@ -100,21 +181,27 @@ def shortest_distance(graph, start, end):
     if start == end:
         return 0, [start]
 
-    queue = deque()
-    queue.append((start, [start]))
-    visited = {start}
+    # 队列只存节点，路径由前驱表回溯得到：大图 (含磁盘分片存储) 上每个已访问节点只占一个字典项
+    queue = deque([start])
+    parent = {start: None}
 
     while queue:
-        curr, path = queue.popleft()
+        curr = queue.popleft()
         for neighbor in graph.get_neighbors(curr):
             if neighbor == end:
-                return len(path), path + [neighbor]
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, path + [neighbor]))
+                path = [neighbor]
+                while curr is not None:
+                    path.append(curr)
+                    curr = parent[curr]
+                path.reverse()
+                return len(path) - 1, path
+            if neighbor not in parent:
+                parent[neighbor] = curr
+                queue.append(neighbor)
     return -1, []
 
 
+@instrument()
 def get_interest_similarity(u1_int, u2_int):
     """
     计算两名用户间的兴趣爱好相似度 (Jaccard 交并比)
@@ -133,51 +220,275 @@ def get_interest_similarity(u1_int, u2_int):
     return len(st1.intersection(st2)) / len(st1.union(st2))
 
 
-def recommend_top_k(graph, hash_table, target_user, k=3):
+# 链路预测特征名，compute_link_features 的特征元组按此顺序排列
+LINK_FEATURES = ("common", "adamic_adar", "resource_allocation", "neighbor_jaccard", "interest")
+
+# 默认打分公式: 兴趣交并比 * 0.7 + 共同好友数 * 0.1
+DEFAULT_WEIGHTS = {"interest": 0.7, "common": 0.1}
+
+
+def parse_weights(text):
     """
-    基于用户画像及社交关系拓扑进行的 Top-K 个性化推荐引擎
+    解析 "interest=0.7,common=0.1" 形式的权重配置
 
-    依据算法:
-        1. 获取所有非目标、非一度关联的其他潜在节点
-        2. 基于兴趣交并比 (权重 0.7) + 共同好友数量 (权重 0.1) 计算综合匹配 Score
-        3. 利用定长最小堆 (MinHeap) 实时保留评分最为优异的 K 个个体推荐
+    Raises:
+        ValueError: 特征名未知或权重不是数字
+    """
+    weights = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, sep, value = part.partition("=")
+        name = name.strip()
+        if not sep or name not in LINK_FEATURES:
+            raise ValueError(f"未知的推荐特征: {part.strip()} (可选: {', '.join(LINK_FEATURES)})")
+        try:
+            weights[name] = float(value)
+        except ValueError:
+            raise ValueError(f"推荐特征权重必须为数字: {part.strip()}")
+    return weights
+
+
+@instrument()
+def compute_link_features(graph, hash_table, target_user, candidates=None, with_interest=True):
+    """
+    一次遍历目标用户的两跳邻域，同时算出全部链路预测特征
+
+    对每个一度好友 m (度数 d_m) 及其每个邻居 c，累加:
+        共同好友数 += 1，Adamic-Adar += 1 / ln(d_m)，资源分配指数 += 1 / d_m
+    遍历结束后由共同好友数直接换算邻居交并比，无需为每个候选重建邻居集合。
+    兴趣交并比只解析一次目标兴趣，候选侧与之求交。
 
     Args:
         graph (Graph): 底层社交网络图谱
-        hash_table (HashTable): 利用哈希拉链表 O(1) 获取用户详情缓存
+        hash_table (HashTable): 用户详情缓存
         target_user (str): 推荐基准发起用户
-        k (int): 截断返回的推荐列表容量，默认返回 3 席
+        candidates (iterable): 需要兴趣特征的候选集合，缺省为全部用户；
+                               为 None 且 with_interest 为 False 时只返回两跳邻域内的候选
+        with_interest (bool): 是否计算兴趣交并比 (需要扫描候选集合)
 
     Returns:
-        list[tuple]: 排序好的推荐列表 (最终合并分数, 被推用户ID, 被推用户姓名)
+        dict: {候选用户ID: 特征元组 (顺序同 LINK_FEATURES)}，不含目标本人及其一度好友
     """
     u_info = hash_table.get(target_user)
     if not u_info:
+        return {}
+    first_nbrs = graph.get_neighbors(target_user)
+    first_deg = set(first_nbrs)
+    deg_t = len(first_nbrs)
+
+    # 两跳遍历：cn / aa / ra 三项一起累加
+    acc = {}
+    for m in first_nbrs:
+        m_nbrs = graph.get_neighbors(m)
+        d_m = len(m_nbrs)
+        aa_w = 1.0 / math.log(d_m) if d_m > 1 else 0.0
+        ra_w = 1.0 / d_m if d_m else 0.0
+        for c in m_nbrs:
+            if c == target_user or c in first_deg:
+                continue
+            cur = acc.get(c)
+            if cur is None:
+                acc[c] = [1, aa_w, ra_w]
+            else:
+                cur[0] += 1
+                cur[1] += aa_w
+                cur[2] += ra_w
+
+    t_tags = set(u_info["interests"].split(";")) if u_info["interests"] else set()
+    if with_interest:
+        pool = hash_table.get_all_keys() if candidates is None else candidates
+    else:
+        pool = acc.keys() if candidates is None else candidates
+
+    features = {}
+    for uid in pool:
+        if uid == target_user or uid in first_deg or uid in features:
+            continue
+        g = acc.get(uid)
+        if g is not None:
+            cn, aa, ra = g
+            d_c = len(graph.get_neighbors(uid))
+            nj = cn / (deg_t + d_c - cn) if deg_t + d_c - cn > 0 else 0.0
+        else:
+            cn, aa, ra, nj = 0, 0.0, 0.0, 0.0
+        sim = 0.0
+        if with_interest and t_tags:
+            o_info = hash_table.get(uid)
+            if not o_info:
+                continue
+            if o_info["interests"]:
+                o_tags = o_info["interests"].split(";")
+                inter = len(t_tags.intersection(o_tags))
+                if inter:
+                    sim = inter / (len(t_tags) + len(set(o_tags)) - inter)
+        features[uid] = (cn, aa, ra, nj, sim)
+    return features
+
+
+def pair_link_features(graph, hash_table, target_user, other):
+    """
+    单独计算一对用户的链路预测特征 (结果与 compute_link_features 中该候选的取值逐位一致)
+
+    只访问两人的一度邻居，供推荐缓存在档案变更时就地修补单个候选的得分。
+
+    Returns:
+        tuple | None: 特征元组 (顺序同 LINK_FEATURES)；任一方不在库内时返回 None
+    """
+    u_info = hash_table.get(target_user)
+    o_info = hash_table.get(other)
+    if not u_info or not o_info:
+        return None
+    t_nbrs = graph.get_neighbors(target_user)
+    o_nbrs = graph.get_neighbors(other)
+    o_set = set(o_nbrs)
+    cn, aa, ra = 0, 0.0, 0.0
+    for m in t_nbrs:
+        if m in o_set:
+            d_m = len(graph.get_neighbors(m))
+            cn += 1
+            aa += 1.0 / math.log(d_m) if d_m > 1 else 0.0
+            ra += 1.0 / d_m
+    nj = cn / (len(t_nbrs) + len(o_nbrs) - cn) if cn else 0.0
+    sim = 0.0
+    if u_info["interests"] and o_info["interests"]:
+        t_tags = set(u_info["interests"].split(";"))
+        o_tags = o_info["interests"].split(";")
+        inter = len(t_tags.intersection(o_tags))
+        if inter:
+            sim = inter / (len(t_tags) + len(set(o_tags)) - inter)
+    return (cn, aa, ra, nj, sim)
+
+
+def weighted_terms(weights):
+    """
+    将权重字典展开为 [(特征下标, 权重)]，供打分内层循环做定长乘加
+
+    兴趣项排在最前，保持 兴趣 * 0.7 + 共同好友 * 0.1 的求和顺序，与原公式逐位一致。
+    """
+    terms = [(i, weights[name]) for i, name in enumerate(LINK_FEATURES) if weights.get(name)]
+    terms.sort(key=lambda item: item[0] != 4)
+    return terms
+
+
+def link_score(features, terms):
+    score = 0.0
+    for i, w in terms:
+        score += features[i] * w
+    return score
+
+
+def ranking_key(item):
+    """
+    推荐结果的统一排序键：得分降序，同分按统一ID口径升序
+
+    全量排序与推荐缓存的就地修补共用这一口径，同分候选的先后不随计算路径变化。
+    """
+    return (-item[0], uid_sort_key(item[1]))
+
+
+class _HeapRank:
+    """
+    Top-K 最小堆中的比较键：得分低者在堆顶先被淘汰，同分时统一ID口径靠后者先被淘汰
+
+    同分极少出现，ID 排序键只在比较同分项时才计算。
+    """
+    __slots__ = ("score", "uid", "_key")
+
+    def __init__(self, score, uid):
+        self.score = score
+        self.uid = uid
+        self._key = None
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = uid_sort_key(self.uid)
+        return self._key
+
+    def __lt__(self, other):
+        if self.score != other.score:
+            return self.score < other.score
+        return self.key > other.key
+
+
+@instrument()
+def rank_candidates(graph, hash_table, target_user, k=3, influence=None, influence_weight=0.1,
+                    candidates=None, weights=None):
+    """
+    recommend_top_k 的未取整版本，返回原始得分，供推荐缓存精确比较与修补
+
+    Returns:
+        list[tuple]: 按得分降序 (同分按统一ID口径升序) 的 (得分, 被推用户ID, 被推用户姓名)
+    """
+    if not hash_table.get(target_user):
         return []
-    first_deg = set(graph.get_neighbors(target_user))
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    with_interest = bool(weights.get("interest"))
+    inf_scale = 0.0
+    if influence:
+        max_inf = max(influence.values())
+        inf_scale = influence_weight / max_inf if max_inf > 0 else 0.0
+    if candidates is None and inf_scale:
+        # 影响力先验对两跳之外的用户同样生效，需要扫描全部用户
+        candidates = hash_table.get_all_keys()
+
+    features = compute_link_features(graph, hash_table, target_user, candidates, with_interest)
+    terms = weighted_terms(weights)
     heap = MinHeap()
 
-    for uid in hash_table.get_all_keys():
-        if uid == target_user or uid in first_deg:
-            continue
-        o_info = hash_table.get(uid)
-
-        sim = get_interest_similarity(u_info["interests"], o_info["interests"])
-        common = len(
-            set(graph.get_neighbors(target_user)).intersection(
-                set(graph.get_neighbors(uid))
-            )
-        )
-        score = sim * 0.7 + common * 0.1
+    for uid, feats in features.items():
+        score = link_score(feats, terms)
+        if inf_scale:
+            score += influence.get(uid, 0.0) * inf_scale
 
         if score > 0:
             if len(heap.heap) < k:
-                heap.push((score, uid, o_info["name"]))
-            elif score > heap.heap[0][0]:
-                heap.pop()
-                heap.push((score, uid, o_info["name"]))
+                o_info = hash_table.get(uid)
+                if o_info:
+                    heap.push((_HeapRank(score, uid), uid, o_info["name"]))
+                continue
+            worst = heap.heap[0][0]
+            # 同分时按统一ID口径取舍，结果与候选的遍历顺序无关
+            if score > worst.score or (score == worst.score and uid_sort_key(uid) < worst.key):
+                o_info = hash_table.get(uid)
+                if o_info:
+                    heap.pop()
+                    heap.push((_HeapRank(score, uid), uid, o_info["name"]))
 
     res = []
     while len(heap.heap) > 0:
-        res.insert(0, heap.pop())
+        rank, uid, name = heap.pop()
+        res.insert(0, (rank.score, uid, name))
+    return res
+
+
+@instrument()
+def recommend_top_k(graph, hash_table, target_user, k=3, influence=None, influence_weight=0.1,
+                    candidates=None, weights=None):
+    """
+    基于用户画像及社交关系拓扑进行的 Top-K 个性化推荐引擎
+
+    依据算法:
+        1. 获取所有非目标、非一度关联的其他潜在节点 (可由 candidates 缩小为如同社区成员)
+        2. 一次两跳遍历算出共同好友、Adamic-Adar、资源分配、邻居交并比与兴趣交并比，
+           按 weights 线性加权得到综合匹配 Score (默认 兴趣交并比 * 0.7 + 共同好友数量 * 0.1)
+           若提供影响力先验 (如 PageRank 得分)，再叠加 归一化影响力 * influence_weight
+        3. 利用定长最小堆 (MinHeap) 实时保留评分最为优异的 K 个个体推荐，同分按统一ID口径升序
+
+    Args:
+        graph (Graph): 底层社交网络图谱
+        hash_table (HashTable): 利用哈希拉链表 O(1) 获取用户详情缓存
+        target_user (str): 推荐基准发起用户
+        k (int): 截断返回的推荐列表容量，默认返回 3 席
+        influence (dict): 可选的影响力先验 {用户ID: 得分}，按最大值归一化后参与打分
+        influence_weight (float): 影响力先验的权重
+        candidates (iterable): 可选的候选用户集合，缺省扫描全部用户
+        weights (dict): 特征权重 {特征名: 权重}，特征名见 LINK_FEATURES，缺省为 DEFAULT_WEIGHTS；
+                        不含 interest 时只在两跳邻域内挑选候选，省去全量扫描
+
+    Returns:
+        list[tuple]: 排序好的推荐列表 (最终合并分数, 被推用户ID, 被推用户姓名)
+    """
+    res = rank_candidates(graph, hash_table, target_user, k, influence, influence_weight, candidates, weights)
     return [(round(s, 2), u, n) for s, u, n in res]
@@ -0,0 +1,224 @@
+﻿"""
+好友亲密度 (边权) 缓存与"最强引荐路径"查询模块
+
+1. 亲密度 ∈ [0, 1]：兴趣交并比与共同好友比例的加权和，首次用到时计算并按边缓存
+2. 订阅图谱与哈希表的变更事件：关系变化只影响两端点关联边的共同好友比例，
+   档案变化只影响该用户关联边的兴趣项，仅失效这些边的缓存
+3. strongest_path 以 Dijkstra + 带索引最小堆 (decrease-key) 求路径强度 (沿途各边强度之积) 最大的引荐链
+"""
+
+import sys
+import os
+import math
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_structure.heap import IndexedMinHeap
+from utils.profiler import instrument
+
+INTEREST_WEIGHT = 0.7
+MUTUAL_WEIGHT = 0.3
+# 边强度下限：兴趣与共同好友都为零的好友关系仍可引荐，只是路径强度较低
+STRENGTH_FLOOR = 0.1
+
+
+def _edge(u, v):
+    return (u, v) if u <= v else (v, u)
+
+
+def _tags(info):
+    return set(info["interests"].split(";")) if info and info["interests"] else set()
+
+
+def tie_strength(intimacy):
+    """
+    亲密度 → 边强度 ∈ [STRENGTH_FLOOR, 1]；路径强度为各边强度之积
+    """
+    return STRENGTH_FLOOR + (1.0 - STRENGTH_FLOOR) * intimacy
+
+
+class IntimacyWeights:
+    """
+    按边缓存的好友亲密度
+
+    亲密度 = INTEREST_WEIGHT · 兴趣交并比 + MUTUAL_WEIGHT · 共同好友数 / 两人其他好友的并集大小
+
+    Attributes:
+        computed (int): 实际计算 (未命中缓存) 的边数
+        invalidations (int): 因数据变更被失效的边数
+    """
+    def __init__(self, graph, hash_table):
+        self.graph = graph
+        self.hash_table = hash_table
+        self._weights = {}
+        # 节点 → 已缓存的关联边的另一端，失效时无需扫描整个缓存
+        self._by_node = {}
+        # 多个读者可能同时填充缓存，写入由互斥锁保护 (数据变更回调发生在写锁内，与查询互斥)
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._weights)
+
+    def attach(self):
+        """
+        订阅图谱与哈希表的变更事件，此后数据修改会自动失效受影响的边
+        """
+        self.graph.add_listener(self.on_graph_change)
+        self.hash_table.add_listener(self.on_profile_change)
+        return self
+
+    def detach(self):
+        self.graph.remove_listener(self.on_graph_change)
+        self.hash_table.remove_listener(self.on_profile_change)
+
+    def _compute(self, u_nbrs, u_tags, v):
+        v_nbrs = self.graph.get_neighbors(v)
+        common = sum(1 for m in v_nbrs if m in u_nbrs)
+        # 两人互为好友，并集中扣除彼此
+        union = len(u_nbrs) + len(v_nbrs) - common - 2
+        mutual = common / union if union > 0 else 0.0
+        interest = 0.0
+        v_tags = _tags(self.hash_table.get(v))
+        if u_tags and v_tags:
+            inter = len(u_tags & v_tags)
+            interest = inter / (len(u_tags) + len(v_tags) - inter)
+        return INTEREST_WEIGHT * interest + MUTUAL_WEIGHT * mutual
+
+    def neighbor_weights(self, user_id):
+        """
+        用户与全部直接好友的亲密度；未缓存的边共用一次 user_id 邻居集合的构建
+
+        Returns:
+            list[tuple]: [(好友ID, 亲密度)]，顺序同 graph.get_neighbors
+        """
+        nbrs = self.graph.get_neighbors(user_id)
+        weights = self._weights
+        res = []
+        missing = []
+        for v in nbrs:
+            w = weights.get(_edge(user_id, v))
+            if w is None:
+                missing.append(len(res))
+            res.append((v, w))
+        if missing:
+            u_nbrs = set(nbrs)
+            u_tags = _tags(self.hash_table.get(user_id))
+            for i in missing:
+                v = res[i][0]
+                res[i] = (v, self._compute(u_nbrs, u_tags, v))
+            with self._lock:
+                for i in missing:
+                    v, w = res[i]
+                    weights[_edge(user_id, v)] = w
+                    self._by_node.setdefault(user_id, set()).add(v)
+                    self._by_node.setdefault(v, set()).add(user_id)
+                self.computed += len(missing)
+        return res
+
+    def weight(self, u, v):
+        """
+        Returns:
+            float | None: 两人的亲密度；不是好友时返回 None
+        """
+        w = self._weights.get(_edge(u, v))
+        if w is not None:
+            return w
+        if not self.graph.has_edge(u, v):
+            return None
+        w = self._compute(set(self.graph.get_neighbors(u)), _tags(self.hash_table.get(u)), v)
+        with self._lock:
+            self._weights[_edge(u, v)] = w
+            self._by_node.setdefault(u, set()).add(v)
+            self._by_node.setdefault(v, set()).add(u)
+            self.computed += 1
+        return w
+
+    def invalidate(self, user_ids=None):
+        """
+        失效指定用户 (缺省为全部) 关联边的亲密度
+
+        Returns:
+            int: 实际失效的边数
+        """
+        with self._lock:
+            if user_ids is None:
+                count = len(self._weights)
+                self._weights.clear()
+                self._by_node.clear()
+            else:
+                count = 0
+                for uid in user_ids:
+                    for other in self._by_node.pop(uid, ()):
+                        if self._weights.pop(_edge(uid, other), None) is not None:
+                            count += 1
+                        partners = self._by_node.get(other)
+                        if partners is not None:
+                            partners.discard(uid)
+            self.invalidations += count
+        return count
+
+    def stats(self):
+        return {"size": len(self._weights), "computed": self.computed, "invalidations": self.invalidations}
+
+    def on_graph_change(self, event, u, v):
+        if not self._weights:
+            return
+        if event == "remove_node":
+            # 被删节点曾是其原邻居之间的共同好友
+            self.invalidate([u] + list(v))
+        else:
+            # 端点的好友集合变化，只影响端点关联边的共同好友比例
+            self.invalidate((u, v))
+
+    def on_profile_change(self, event, key, old_value, new_value):
+        if not self._weights:
+            return
+        if event == "remove" or old_value is None or old_value["interests"] != new_value["interests"]:
+            self.invalidate([key])
+
+
+@instrument()
+def strongest_path(graph, weights, start, end):
+    """
+    亲密度加权的"最强引荐路径"：最大化沿途各边强度之积
+
+    边代价取 -log(边强度) ≥ 0，转化为最短路后用 Dijkstra 求解；
+    带索引最小堆对已在堆中的节点原地降低优先级，每个节点只入堆一次。
+
+    Args:
+        graph (Graph): 无向图数据结构
+        weights (IntimacyWeights): 亲密度缓存
+        start (str): 起点用户 ID
+        end (str): 终点用户 ID
+
+    Returns:
+        tuple[float, list]: (路径强度, [经过路径的ID序列])。若无连通路径返回 (0.0, [])
+    """
+    if start == end:
+        return 1.0, [start]
+    heap = IndexedMinHeap()
+    heap.push(start, 0.0)
+    parent = {start: None}
+    settled = set()
+    while heap:
+        cost, u = heap.pop()
+        if u == end:
+            path = []
+            while u is not None:
+                path.append(u)
+                u = parent[u]
+            path.reverse()
+            return math.exp(-cost), path
+        settled.add(u)
+        for v, w in weights.neighbor_weights(u):
+            if v in settled:
+                continue
+            c = cost - math.log(tie_strength(w))
+            if v not in heap:
+                heap.push(v, c)
+                parent[v] = u
+            elif heap.decrease_key(v, c):
+                parent[v] = u
+    return 0.0, []
@@ -0,0 +1,210 @@
+﻿"""
+推荐结果缓存模块
+
+按用户缓存 Top-K 推荐结果 (LRU 淘汰)，并订阅图谱与哈希表的变更事件做增量维护：
+1. 好友关系变化只会改变端点两跳范围内用户的共同好友等特征，仅失效这些用户的缓存
+2. 档案变化只改变被修改用户作为候选时的兴趣得分，逐条就地修补，无法精确修补时才失效
+反复查看同一用户的推荐 (如界面 do_rec) 直接命中内存，无需重新扫描全网。
+"""
+
+import sys
+import os
+import threading
+from collections import OrderedDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from algorithm import algorithms as algo
+
+
+class RecommendationCache:
+    """
+    每用户 Top-K 推荐缓存
+
+    缓存条目: 用户ID → (k, 按得分降序的 [(原始得分, 被推用户ID, 被推用户姓名)])
+    对外返回时与 recommend_top_k 一样保留两位小数。
+
+    Attributes:
+        capacity (int): 最多缓存的用户数，超出后淘汰最久未访问的条目
+        hits / misses (int): 命中与未命中次数
+        invalidations (int): 因数据变更被失效的条目数
+        patches (int): 档案变更时被就地修补的条目数
+        evictions (int): 因容量不足被淘汰的条目数
+    """
+    def __init__(self, graph, hash_table, capacity=1024, weights=None):
+        self.graph = graph
+        self.hash_table = hash_table
+        self.capacity = capacity
+        self.weights = algo.DEFAULT_WEIGHTS if weights is None else weights
+        self._terms = algo.weighted_terms(self.weights)
+        # 邻居交并比依赖候选本人的度数，关系变化的影响范围因此多出一跳
+        self._radius = 2 if self.weights.get("neighbor_jaccard") else 1
+        self._entries = OrderedDict()
+        # 多个读者可能同时查询，LRU 顺序调整与写入由互斥锁保护 (数据变更回调发生在写锁内，与查询互斥)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.patches = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, user_id):
+        return user_id in self._entries
+
+    def attach(self):
+        """
+        订阅图谱与哈希表的变更事件，此后数据修改会自动维护缓存
+        """
+        self.graph.add_listener(self.on_graph_change)
+        self.hash_table.add_listener(self.on_profile_change)
+        return self
+
+    def detach(self):
+        self.graph.remove_listener(self.on_graph_change)
+        self.hash_table.remove_listener(self.on_profile_change)
+
+    def recommend(self, user_id, k=3):
+        """
+        获取用户的 Top-K 推荐；缓存中已有不少于 k 条的结果时直接截取返回
+
+        Returns:
+            list[tuple]: 同 recommend_top_k，(最终合并分数, 被推用户ID, 被推用户姓名)
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] >= k:
+                self.hits += 1
+                self._entries.move_to_end(user_id)
+                res = entry[1][:k]
+            else:
+                self.misses += 1
+                res = None
+        if res is None:
+            res = algo.rank_candidates(self.graph, self.hash_table, user_id, k, weights=self.weights)
+            if self.hash_table.get(user_id):
+                with self._lock:
+                    self._store(user_id, k, res)
+        return [(round(s, 2), u, n) for s, u, n in res]
+
+    def _store(self, user_id, k, res):
+        self._entries[user_id] = (k, res)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_ids=None):
+        """
+        失效指定用户 (缺省为全部) 的缓存条目
+
+        Returns:
+            int: 实际失效的条目数
+        """
+        if user_ids is None:
+            count = len(self._entries)
+            self._entries.clear()
+        else:
+            count = 0
+            for uid in user_ids:
+                if self._entries.pop(uid, None) is not None:
+                    count += 1
+        self.invalidations += count
+        return count
+
+    def stats(self):
+        """
+        Returns:
+            dict: 命中率等统计信息
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "patches": self.patches,
+            "evictions": self.evictions,
+        }
+
+    def _affected(self, seeds):
+        """
+        seeds 及其一跳邻居 (radius 为 2 时再扩一跳) 中已被缓存的用户
+        """
+        frontier = set(seeds)
+        for uid in seeds:
+            frontier.update(self.graph.get_neighbors(uid))
+        if self._radius == 1:
+            return [uid for uid in frontier if uid in self._entries]
+        return [uid for uid in self._entries
+                if uid in frontier or not frontier.isdisjoint(self.graph.get_neighbors(uid))]
+
+    def on_graph_change(self, event, u, v):
+        if not self._entries:
+            return
+        if event == "remove_node":
+            # 被删节点曾是原邻居之间的共同好友，也是原邻居的邻居们的候选
+            self.invalidate(self._affected([u] + list(v)))
+        else:
+            self.invalidate(self._affected((u, v)))
+
+    def on_profile_change(self, event, key, old_value, new_value):
+        if not self._entries:
+            return
+        if event == "remove":
+            self.invalidate([key])
+            for uid, (k, res) in list(self._entries.items()):
+                if any(cid == key for _, cid, _ in res):
+                    self._drop_candidate(uid, k, res, key)
+            return
+
+        interests_changed = old_value is None or old_value["interests"] != new_value["interests"]
+        if interests_changed:
+            self.invalidate([key])
+        if not interests_changed or not self.weights.get("interest"):
+            # 只改了姓名，或打分不含兴趣项：得分不变，只需同步姓名
+            for uid, (k, res) in self._entries.items():
+                for i, (s, cid, _) in enumerate(res):
+                    if cid == key:
+                        res[i] = (s, cid, new_value["name"])
+            return
+
+        for uid, (k, res) in list(self._entries.items()):
+            if uid == key or key in self.graph.get_neighbors(uid):
+                continue
+            self._patch_candidate(uid, k, res, key, new_value["name"])
+
+    def _drop_candidate(self, uid, k, res, key):
+        kept = [item for item in res if item[1] != key]
+        if len(res) < k:
+            # 原结果不满 K 条说明全部正分候选都已在列，直接剔除即可
+            self._entries[uid] = (k, kept)
+            self.patches += 1
+        else:
+            self.invalidate([uid])
+
+    def _patch_candidate(self, uid, k, res, key, name):
+        """
+        用户 key 的兴趣变化后重算其作为 uid 候选时的得分，并就地调整 uid 的缓存
+        """
+        feats = algo.pair_link_features(self.graph, self.hash_table, uid, key)
+        score = algo.link_score(feats, self._terms) if feats else 0.0
+        old = next((item for item in res if item[1] == key), None)
+        if old is not None and score < old[0] and len(res) >= k:
+            # 原本在列的候选降分，其下方可能有未缓存的候选递补，无法就地修补
+            self.invalidate([uid])
+            return
+        kept = [item for item in res if item[1] != key]
+        item = (score, key, name)
+        if score > 0 and (len(kept) < k or algo.ranking_key(item) < algo.ranking_key(kept[-1])):
+            kept.append(item)
+            # 与 rank_candidates 相同的排序口径，修补后的结果与全量重算一致
+            kept.sort(key=algo.ranking_key)
+            kept = kept[:k]
+        elif old is None:
+            return
+        self._entries[uid] = (k, kept)
+        self.patches += 1
@@ -0,0 +1,188 @@
+﻿"""
+社交距离分布 ("六度分隔") 统计模块
+
+逐对调用 shortest_distance 统计全网距离分布的代价为 O(n · (n + m))，百万级网络上不可行。
+本模块采用位并行多源 BFS：
+1. 一批最多 64 个源点，每个节点用一个 64 位整数记录"哪些源点已到达"，
+   一层扩展 = 对每个节点的邻居位掩码做按位或，一次 CSR 扫描同时推进 64 次 BFS
+2. 每层新到达的位数 (popcount) 即为该距离上的 (源点, 节点) 对数，顺带累计每个节点的距离和
+3. 可只抽样部分源点估计分布与接近中心性；多批源点可分派到进程池并行计算
+"""
+
+import sys
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.profiler import instrument
+
+BATCH_BITS = 64
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(values):
+        return np.bitwise_count(values)
+else:
+    _POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _POP8[values.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.uint8)
+
+
+class _Accumulator:
+    """
+    一组源点批次的累计结果
+
+    Attributes:
+        histogram (list[int]): 距离 d → 可达 (源点, 节点) 对数
+        reach (ndarray): 每个节点被多少个 (其他) 源点到达
+        dist_sum (ndarray): 每个节点到各源点的距离之和
+    """
+    def __init__(self, n):
+        self.histogram = [0]
+        self.reach = np.zeros(n, dtype=np.int64)
+        self.dist_sum = np.zeros(n, dtype=np.int64)
+
+    def merge(self, other):
+        if len(other.histogram) > len(self.histogram):
+            self.histogram.extend([0] * (len(other.histogram) - len(self.histogram)))
+        for d, c in enumerate(other.histogram):
+            self.histogram[d] += c
+        self.reach += other.reach
+        self.dist_sum += other.dist_sum
+
+
+def _bfs_batch(indptr, indices, rows, sources, acc):
+    """
+    对至多 64 个源点同时执行 BFS，把每层的新到达情况累计到 acc
+
+    Args:
+        indptr / indices (ndarray): CSR 邻接结构
+        rows (ndarray): 度数大于 0 的节点编号 (reduceat 的分段起点)
+        sources (ndarray): 本批源点编号
+    """
+    n = len(indptr) - 1
+    bits = np.left_shift(np.uint64(1), np.arange(len(sources), dtype=np.uint64))
+    visited = np.zeros(n, dtype=np.uint64)
+    np.bitwise_or.at(visited, sources, bits)
+    frontier = visited.copy()
+    seg_starts = indptr[rows]
+    nxt = np.zeros(n, dtype=np.uint64)
+    d = 0
+    while len(indices):
+        d += 1
+        # 每个节点的新位掩码 = 其全部邻居上一层位掩码的按位或
+        nxt[rows] = np.bitwise_or.reduceat(frontier[indices], seg_starts)
+        new = nxt & ~visited
+        if not new.any():
+            break
+        visited |= new
+        frontier = new
+        counts = _popcount(new).astype(np.int64)
+        if len(acc.histogram) <= d:
+            acc.histogram.append(0)
+        acc.histogram[d] += int(counts.sum())
+        acc.reach += counts
+        acc.dist_sum += counts * d
+
+
+# 进程池工作进程中的 CSR 结构 (由 _init_worker 在每个进程中设置一次)
+_WORKER_CSR = None
+
+
+def _init_worker(indptr, indices):
+    global _WORKER_CSR
+    _WORKER_CSR = (indptr, indices, np.flatnonzero(np.diff(indptr)))
+
+
+def _run_batches(batches, csr=None):
+    indptr, indices, rows = csr if csr is not None else _WORKER_CSR
+    acc = _Accumulator(len(indptr) - 1)
+    for sources in batches:
+        _bfs_batch(indptr, indices, rows, sources, acc)
+    return acc
+
+
+def _effective_diameter(histogram, quantile=0.9):
+    """
+    覆盖 quantile 比例可达节点对所需的 (线性插值) 距离
+    """
+    total = sum(histogram)
+    if total == 0:
+        return 0.0
+    target = quantile * total
+    cum = 0
+    for d in range(1, len(histogram)):
+        prev = cum
+        cum += histogram[d]
+        if cum >= target:
+            return (d - 1) + (target - prev) / histogram[d]
+    return float(len(histogram) - 1)
+
+
+@instrument()
+def distance_statistics(graph, sample=None, seed=42, workers=1):
+    """
+    全网距离分布、平均路径长度、有效直径与接近中心性
+
+    Args:
+        graph (Graph): 无向图 (或其快照 / 磁盘分片存储)
+        sample (int | None): 抽样的源点数，缺省以全部节点为源点 (精确结果)
+        seed (int): 抽样随机种子
+        workers (int): 进程数；大于 1 时把源点批次分派到进程池并行计算
+
+    Returns:
+        dict: sources (源点数)、exact (是否精确)、histogram [(距离, 节点对数)]、
+              reachable_pairs、avg_path_length、diameter (观测到的最大距离)、
+              effective_diameter (90% 分位，线性插值)、within_six (6 跳内可达的比例)、
+              closeness {用户ID: 接近中心性}
+    """
+    cg = graph.compact()
+    n = len(cg)
+    indptr = np.frombuffer(cg.indptr, dtype=np.int64)
+    indices = np.frombuffer(cg.indices, dtype=np.int32).astype(np.int64)
+
+    if sample is None or sample >= n:
+        sources = np.arange(n, dtype=np.int64)
+    else:
+        sources = np.array(sorted(random.Random(seed).sample(range(n), sample)), dtype=np.int64)
+    k = len(sources)
+    batches = [sources[i:i + BATCH_BITS] for i in range(0, k, BATCH_BITS)]
+
+    if workers > 1 and len(batches) > 1:
+        chunks = [batches[i::workers] for i in range(workers)]
+        acc = _Accumulator(n)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(indptr, indices)) as pool:
+            for part in pool.map(_run_batches, [c for c in chunks if c]):
+                acc.merge(part)
+    else:
+        acc = _run_batches(batches, (indptr, indices, np.flatnonzero(np.diff(indptr))))
+
+    histogram = acc.histogram
+    total = sum(histogram)
+    weighted = sum(d * c for d, c in enumerate(histogram))
+
+    # 接近中心性 (Wasserman-Faust 修正，适用于非连通图)：(r / Σd) · (r / 其余源点数)
+    # 无向图中 d(s, v) = d(v, s)，抽样时即为以样本源点估计的结果
+    is_source = np.zeros(n, dtype=np.int64)
+    is_source[sources] = 1
+    others = k - is_source
+    reach = acc.reach.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closeness = np.where((acc.dist_sum > 0) & (others > 0),
+                             reach / acc.dist_sum * reach / np.maximum(others, 1), 0.0)
+
+    return {
+        "sources": k,
+        "exact": k == n,
+        "histogram": [(d, c) for d, c in enumerate(histogram) if d > 0 and c > 0],
+        "reachable_pairs": total,
+        "avg_path_length": weighted / total if total else 0.0,
+        "diameter": len(histogram) - 1,
+        "effective_diameter": _effective_diameter(histogram),
+        "within_six": sum(histogram[1:7]) / total if total else 0.0,
+        "closeness": dict(zip(cg.nodes, closeness.tolist())),
+    }
@@ -0,0 +1,413 @@
+﻿"""
+无界面命令行批量查询入口
+
+只依赖自研的 data_structure / algorithm / utils 三层，不导入 Tkinter、NetworkX 与 Matplotlib，
+可在无显示器的服务器上快速启动。数据集只装载一次，随后对单个用户或 ID 列表文件
+逐条执行 first / second / distance / strongest / recommend / similar 查询，并以 JSON Lines 或 CSV 流式输出。
+purge 命令按 ID 列表批量注销用户 (一次性重建受影响的邻接表) 并只回写一次数据文件。
+--graph-store 改用磁盘分片邻接存储执行查询，适用于超出内存的关系网络。
+--db 改从 SQLite 数据库加载 (库为空时先由数据文件导入)，purge 只提交被删除的行。
+separation / closeness 为全网统计 (无需指定用户)：位并行多源 BFS 计算距离分布与接近中心性；
+brokers 按 Brandes 介数中心性列出桥梁用户。三者均可用 --sample 抽样源点、--workers 多进程并行。
+
+用法示例:
+    python src/cli.py first --user 1
+    python src/cli.py second --ids-file ids.txt --format csv
+    python src/cli.py distance --user 1 --target 7
+    python src/cli.py strongest --user 1 --target 7
+    python src/cli.py recommend --ids-file ids.txt -k 5 --output rec.jsonl
+    python src/cli.py similar --user 1 --threshold 0.3
+    python src/cli.py purge --ids-file inactive.txt
+    python src/cli.py distance --user 1 --target 7 --graph-store data/store
+    python src/cli.py purge --ids-file inactive.txt --db data/social.db
+    python src/cli.py separation --sample 1024 --workers 4
+    python src/cli.py closeness -k 20 --format csv
+    python src/cli.py brokers -k 10 --sample 200 --workers 4
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from data_structure.hash_table import HashTable
+from data_structure.adjacency_list import Graph
+from utils.data_reader import load_all_data, save_all_data, build_graph_store
+from utils.profiler import PROFILER
+import algorithm.algorithms as algo
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_USER_PATH = os.path.join(BASE_DIR, "data", "user_sample.csv")
+DEFAULT_FRIEND_PATH = os.path.join(BASE_DIR, "data", "friend_sample.txt")
+
+# 各查询输出的扁平字段，JSON Lines 与 CSV 共用同一套列定义
+FIELDS = {
+    "first": ["user", "friend_id", "name"],
+    "second": ["user", "contact_id", "name", "path"],
+    "distance": ["user", "target", "distance", "path"],
+    "strongest": ["user", "target", "strength", "path"],
+    "recommend": ["user", "rank", "candidate_id", "name", "score"],
+    "similar": ["user", "rank", "candidate_id", "name", "similarity"],
+    "purge": ["user", "name", "friends_removed"],
+    "separation": ["distance", "pairs", "fraction", "cumulative"],
+    "closeness": ["rank", "user", "name", "closeness"],
+    "brokers": ["rank", "user", "name", "betweenness"],
+}
+
+# 以 (起点, 终点) 为单位的查询
+PAIR_COMMANDS = ("distance", "strongest")
+# 全网统计命令：不需要 --user / --ids-file
+NETWORK_COMMANDS = ("separation", "closeness", "brokers")
+
+
+def _name_of(hash_table, uid):
+    info = hash_table.get(uid)
+    return info["name"] if info else ""
+
+
+def query_first(graph, hash_table, uid):
+    for fid in algo.get_first_degree(graph, uid):
+        yield {"user": uid, "friend_id": fid, "name": _name_of(hash_table, fid)}
+
+
+def query_second(graph, hash_table, uid):
+    for fid, path in algo.get_second_degree_with_paths(graph, uid):
+        yield {
+            "user": uid,
+            "contact_id": fid,
+            "name": _name_of(hash_table, fid),
+            "path": "->".join(path),
+        }
+
+
+def query_distance(graph, hash_table, uid, target):
+    dist, path = algo.shortest_distance(graph, uid, target)
+    yield {"user": uid, "target": target, "distance": dist, "path": "->".join(path)}
+
+
+def query_strongest(graph, intimacy, uid, target):
+    from algorithm.intimacy import strongest_path
+    strength, path = strongest_path(graph, intimacy, uid, target)
+    yield {"user": uid, "target": target, "strength": round(strength, 6), "path": "->".join(path)}
+
+
+def query_recommend(graph, hash_table, uid, k, influence=None, influence_weight=0.1, communities=None,
+                    weights=None):
+    candidates = communities.candidate_pool(graph, uid) if communities else None
+    recs = algo.recommend_top_k(graph, hash_table, uid, k, influence, influence_weight, candidates, weights)
+    for rank, (score, cid, name) in enumerate(recs, start=1):
+        yield {"user": uid, "rank": rank, "candidate_id": cid, "name": name, "score": score}
+
+
+def query_similar(hash_table, interest_index, uid, k, threshold):
+    res = interest_index.query(user_id=uid, k=k, threshold=threshold)
+    for rank, (sim, cid) in enumerate(res, start=1):
+        yield {"user": uid, "rank": rank, "candidate_id": cid,
+               "name": _name_of(hash_table, cid), "similarity": round(sim, 4)}
+
+
+def purge_users(graph, hash_table, ids):
+    """
+    批量注销用户：档案按桶批量摘除，关系一次性重建受影响的邻接表
+
+    Returns:
+        list[dict]: 每名被注销用户一行 (ID、姓名、解除的好友关系数)
+    """
+    removed = hash_table.remove_many(ids)
+    former = graph.remove_nodes(uid for uid, _ in removed)
+    return [{"user": uid, "name": info["name"], "friends_removed": len(former.get(uid, ()))}
+            for uid, info in removed]
+
+
+def query_separation(graph, hash_table, command, k, sample, workers, err_stream):
+    """
+    全网距离分布 (separation) 或接近中心性最高的 k 个用户 (closeness)；汇总指标写到 err_stream
+    """
+    from algorithm.separation import distance_statistics
+    stats = distance_statistics(graph, sample=sample, workers=workers)
+    err_stream.write(f"[统计] 源点 {stats['sources']} 个{'' if stats['exact'] else ' (抽样估计)'}，"
+                     f"可达节点对 {stats['reachable_pairs']}，平均路径长度 {stats['avg_path_length']:.3f}，"
+                     f"有效直径 {stats['effective_diameter']:.2f}，最大距离 {stats['diameter']}，"
+                     f"6 跳内可达 {stats['within_six']:.1%}\n")
+    if command == "closeness":
+        top = sorted(stats["closeness"].items(), key=lambda x: (-x[1], x[0]))[:k]
+        for rank, (uid, value) in enumerate(top, start=1):
+            yield {"rank": rank, "user": uid, "name": _name_of(hash_table, uid), "closeness": round(value, 6)}
+        return
+    total = stats["reachable_pairs"]
+    cumulative = 0
+    for d, pairs in stats["histogram"]:
+        cumulative += pairs
+        yield {"distance": d, "pairs": pairs, "fraction": round(pairs / total, 6),
+               "cumulative": round(cumulative / total, 6)}
+
+
+def query_brokers(graph, hash_table, k, sample, workers):
+    """
+    介数中心性最高的 k 个桥梁用户
+    """
+    from algorithm.centrality import betweenness_centrality, top_influencers
+    scores = betweenness_centrality(graph, sample=sample, workers=workers)
+    for rank, (score, uid, name) in enumerate(top_influencers(scores, hash_table, k), start=1):
+        yield {"rank": rank, "user": uid, "name": name, "betweenness": round(score, 6)}
+
+
+def iter_requests(args):
+    """
+    逐条产出待查询的用户 ID (distance / strongest 查询产出 (起点, 终点) 二元组)
+
+    ID 文件每行一个用户；distance / strongest 查询时每行为 "起点,终点"，空行与 # 注释行会被跳过。
+    """
+    if args.user is not None:
+        if args.command in PAIR_COMMANDS:
+            yield (args.user.strip(), args.target.strip())
+        else:
+            yield args.user.strip()
+        return
+
+    with open(args.ids_file, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            raw = line.strip()
+            if not raw or raw.startswith("#"):
+                continue
+            if args.command in PAIR_COMMANDS:
+                parts = raw.split(",")
+                if len(parts) != 2:
+                    raise ValueError(f"距离查询格式错误(第{line_no}行): {raw}")
+                yield (parts[0].strip(), parts[1].strip())
+            else:
+                yield raw.split(",")[0].strip()
+
+
+class RowWriter:
+    """
+    流式结果写出器：每条记录立即写出并刷新，便于下游管道边读边处理
+    """
+    def __init__(self, stream, fmt, fields):
+        self.stream = stream
+        self.fmt = fmt
+        self.fields = fields
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=fields, lineterminator="\n")
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.stream.flush()
+
+
+def run(args, out_stream, err_stream):
+    """
+    执行批量查询
+
+    Returns:
+        int: 进程退出码；存在非法 ID 时返回 2，全部成功返回 0
+    """
+    hash_table = HashTable()
+    if args.db:
+        from utils.sqlite_store import open_store
+        store = open_store(args.db, args.users, args.friends)
+        graph = Graph()
+        try:
+            store.load(hash_table, graph)
+            if args.command == "purge":
+                store.attach(hash_table, graph)
+            return _run_queries(args, graph, hash_table, out_stream, err_stream, store)
+        finally:
+            store.close()
+    if args.graph_store:
+        # 档案仍装入内存，邻接表按需从磁盘分片读取；存储目录尚未构建时先由关系文件转换
+        from data_structure.sharded_graph import ShardedGraph, META_FILE
+        load_all_data(args.users, args.friends, hash_table, None)
+        if os.path.exists(os.path.join(args.graph_store, META_FILE)):
+            graph = ShardedGraph(args.graph_store, args.cache_size)
+        else:
+            graph = build_graph_store(args.users, args.friends, args.graph_store, args.shards, args.cache_size)
+    else:
+        graph = Graph()
+        load_all_data(args.users, args.friends, hash_table, graph)
+    try:
+        return _run_queries(args, graph, hash_table, out_stream, err_stream)
+    finally:
+        if args.graph_store:
+            st = graph.stats()
+            err_stream.write(f"[统计] 邻接缓存命中 {st['hits']} 次 / 未命中 {st['misses']} 次 "
+                             f"(命中率 {st['hit_rate']:.1%})，淘汰 {st['evictions']} 次\n")
+            graph.close()
+
+
+def _run_queries(args, graph, hash_table, out_stream, err_stream, store=None):
+    """
+    在已装载的数据上逐条执行查询并流式写出结果
+    """
+    influence = None
+    if args.command == "recommend" and args.influence_weight > 0:
+        # 仅在需要时导入，保持其余查询的启动速度
+        from algorithm.centrality import pagerank
+        influence = pagerank(graph)
+    communities = None
+    if args.command == "recommend" and args.community:
+        from algorithm.community import detect_communities
+        communities = detect_communities(graph, args.community)
+
+    intimacy = None
+    if args.command == "strongest":
+        from algorithm.intimacy import IntimacyWeights
+        # 亲密度按边缓存，批量查询间共享
+        intimacy = IntimacyWeights(graph, hash_table)
+
+    interest_index = None
+    if args.command == "similar":
+        from data_structure.minhash_lsh import MinHashLSH
+        interest_index = MinHashLSH(num_perm=args.num_perm, bands=args.bands).build(hash_table)
+
+    writer = RowWriter(out_stream, args.format, FIELDS[args.command])
+    exit_code = 0
+    if args.command in NETWORK_COMMANDS:
+        if args.command == "brokers":
+            rows = query_brokers(graph, hash_table, args.k, args.sample, args.workers)
+        else:
+            rows = query_separation(graph, hash_table, args.command, args.k, args.sample, args.workers, err_stream)
+        for row in rows:
+            writer.write(row)
+        writer.flush()
+        return exit_code
+    if args.command == "purge":
+        ids = []
+        for uid in iter_requests(args):
+            if not uid or not hash_table.get(uid):
+                err_stream.write(f"[警告] 非法的ID或者ID不在库内: {uid or '(空)'}\n")
+                exit_code = 2
+            else:
+                ids.append(uid)
+        rows = purge_users(graph, hash_table, ids)
+        if rows:
+            # 整批注销完成后只回写一次；数据库后端只提交被删除的行
+            if store is not None:
+                store.commit()
+            else:
+                save_all_data(args.users, args.friends, hash_table, graph)
+        for row in rows:
+            writer.write(row)
+        writer.flush()
+        return exit_code
+
+    for req in iter_requests(args):
+        ids = req if isinstance(req, tuple) else (req,)
+        missing = [uid for uid in ids if not uid or not hash_table.get(uid)]
+        if missing:
+            err_stream.write(f"[警告] 非法的ID或者ID不在库内: {', '.join(missing) or '(空)'}\n")
+            exit_code = 2
+            continue
+
+        if args.command == "first":
+            rows = query_first(graph, hash_table, req)
+        elif args.command == "second":
+            rows = query_second(graph, hash_table, req)
+        elif args.command == "distance":
+            rows = query_distance(graph, hash_table, req[0], req[1])
+        elif args.command == "strongest":
+            rows = query_strongest(graph, intimacy, req[0], req[1])
+        elif args.command == "similar":
+            rows = query_similar(hash_table, interest_index, req, args.k, args.threshold)
+        else:
+            rows = query_recommend(graph, hash_table, req, args.k, influence, args.influence_weight, communities,
+                                   args.weights)
+
+        for row in rows:
+            writer.write(row)
+        writer.flush()
+    return exit_code
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="社交网络分析系统 - 无界面批量查询工具"
+    )
+    parser.add_argument("command", choices=sorted(FIELDS), help="查询类型")
+    who = parser.add_mutually_exclusive_group()
+    who.add_argument("--user", help="单个查询用户 ID")
+    who.add_argument("--ids-file", help="用户 ID 列表文件 (每行一个；distance / strongest 查询为 '起点,终点')")
+    parser.add_argument("--target", help="distance / strongest 查询的终点用户 ID (配合 --user 使用)")
+    parser.add_argument("-k", type=int, default=5, help="recommend / closeness / brokers 查询返回的数量，默认 5")
+    parser.add_argument("--influence-weight", type=float, default=0.0,
+                        help="recommend 查询叠加 PageRank 影响力先验的权重，默认 0 (不启用)")
+    parser.add_argument("--community", choices=["lpa", "louvain"],
+                        help="recommend 查询只在同社区成员中挑选候选 (指定社区发现算法)")
+    parser.add_argument("--weights", help="recommend 查询的特征权重，如 'interest=0.7,common=0.1' "
+                        f"(可选特征: {', '.join(algo.LINK_FEATURES)})")
+    parser.add_argument("--threshold", type=float, default=0.0, help="similar 查询的最低兴趣相似度")
+    parser.add_argument("--num-perm", type=int, default=64, help="similar 查询 MinHash 签名长度")
+    parser.add_argument("--bands", type=int, default=16,
+                        help="similar 查询 LSH 分段数 (越大召回越高、速度越慢)，需整除 --num-perm")
+    parser.add_argument("--sample", type=int,
+                        help="separation / closeness / brokers 抽样的源点数，缺省以全部用户为源点 (精确结果)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="separation / closeness / brokers 并行计算的进程数，默认 1")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="输出格式，默认 jsonl")
+    parser.add_argument("--output", help="输出文件路径，缺省写到标准输出")
+    parser.add_argument("--users", default=DEFAULT_USER_PATH, help="用户信息文件 (CSV)")
+    parser.add_argument("--friends", default=DEFAULT_FRIEND_PATH, help="好友关系文件 (TXT)；purge 会回写这两个文件")
+    parser.add_argument("--profile", help="开启性能埋点，并将统计结果以 JSON 写到该路径")
+    parser.add_argument("--graph-store", help="磁盘分片邻接存储目录 (不存在时由 --users/--friends 构建)；"
+                        "查询按需读取邻接表，不把整张图装入内存")
+    parser.add_argument("--db", help="改用 SQLite 数据库加载 (库为空时由 --users/--friends 导入)")
+    parser.add_argument("--shards", type=int, default=16, help="构建分片存储时的分片数，默认 16")
+    parser.add_argument("--cache-size", type=int, default=1_000_000,
+                        help="分片存储的 LRU 缓存容量 (邻居条目数)，默认 1000000")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command not in NETWORK_COMMANDS and args.user is None and args.ids_file is None:
+        parser.error("必须指定 --user 或 --ids-file 之一")
+    if args.command in PAIR_COMMANDS and args.user is not None and not args.target:
+        parser.error(f"{args.command} 查询配合 --user 使用时必须指定 --target")
+    if args.k <= 0:
+        parser.error("-k 必须为正整数")
+    if args.shards <= 0 or args.cache_size < 0:
+        parser.error("--shards 必须为正整数，--cache-size 不能为负数")
+    if args.graph_store and args.command == "purge":
+        parser.error("purge 需要修改关系数据，不支持 --graph-store")
+    if args.graph_store and (args.command in NETWORK_COMMANDS or args.influence_weight > 0 or args.community):
+        # 整图算法需要把全部关系装入内存，与磁盘分片存储的初衷相悖
+        parser.error("separation / closeness / brokers 与 --influence-weight、--community 需要整张关系网络，不支持 --graph-store")
+    if args.graph_store and args.db:
+        parser.error("--graph-store 与 --db 不能同时使用")
+    if args.bands <= 0 or args.num_perm % args.bands != 0:
+        parser.error("--bands 必须为正整数且能整除 --num-perm")
+    if (args.sample is not None and args.sample <= 0) or args.workers <= 0:
+        parser.error("--sample 与 --workers 必须为正整数")
+    if args.weights is not None:
+        try:
+            args.weights = algo.parse_weights(args.weights)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.profile:
+        PROFILER.enable()
+    try:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8", newline="") as f:
+                return run(args, f, sys.stderr)
+        return run(args, sys.stdout, sys.stderr)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"[错误] {e}\n")
+        return 1
+    finally:
+        if args.profile:
+            PROFILER.export_json(args.profile)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,16 +3,211 @@
 
 自主实现基于字典与列表的无向图结构。
 避免使用任何第三方图论库 (如 NetworkX)。
+全图类算法可通过 compact() 取得以稠密整数编号表示的 CSR 只读快照；
+snapshot() 可冻结当前版本供长时间运行的统计与回写使用 (写时复制，代价与此后的修改量成正比)。
 """
 
+import sys
+import os
+import weakref
+from array import array
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_structure.id_registry import IdRegistry
+
+
+class CompactGraph:
+    """
+    邻接表的 CSR (压缩稀疏行) 只读快照
+
+    节点按 adj_list 顺序编号为 0..n-1，编号 i 的邻居为 indices[indptr[i]:indptr[i + 1]]。
+    整数数组存储比字符串邻接表紧凑得多，且可直接作为下标参与计算。
+
+    Attributes:
+        registry (IdRegistry): 外部ID ↔ 编号映射
+        indptr (array): 长度 n + 1 的行偏移
+        indices (array): 全部邻居编号
+        version (int): 生成快照时图的版本号
+    """
+    def __init__(self, graph):
+        items = list(graph.adjacency_items())
+        self.registry = IdRegistry(node for node, _ in items)
+        index = self.registry.index
+        indptr = array("q", [0])
+        indices = array("i")
+        for _, nbrs in items:
+            indices.extend(map(index.__getitem__, nbrs))
+            indptr.append(len(indices))
+        self.indptr = indptr
+        self.indices = indices
+        self.version = graph.version
+
+    def __len__(self):
+        return len(self.registry)
+
+    @property
+    def nodes(self):
+        return self.registry.ids
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def degree(self, i):
+        return self.indptr[i + 1] - self.indptr[i]
+
+
+# 快照覆盖层中的占位符: 该节点在快照版本中不存在
+_ABSENT = object()
+
+
+class GraphSnapshot:
+    """
+    冻结某一版本的只读图视图 (写时复制)
+
+    创建时不复制任何数据，直接读取原图的邻接表；原图此后每修改一个节点，
+    都会先把该节点的旧邻接列表交给快照保存 (覆盖层)，并在新副本上修改。
+    因此快照的开销只与创建后发生的修改量成正比，未改动的邻接列表在各版本间共享。
+    提供与 Graph 相同的只读接口，可直接传给统计、推荐与回写函数。
+
+    Attributes:
+        version (int): 快照对应的图版本号
+    """
+    def __init__(self, graph):
+        self._graph = graph
+        self._overlay = {}
+        self.version = graph.version
+        self._compact = None
+
+    def _preserve(self, node_id, neighbors):
+        if node_id not in self._overlay:
+            self._overlay[node_id] = _ABSENT if neighbors is None else neighbors
+
+    @property
+    def changed_nodes(self):
+        """创建快照后原图中被修改过的节点数 (即覆盖层大小)"""
+        return len(self._overlay)
+
+    def release(self):
+        """
+        提前解除与原图的关联；此后原图的修改不再为本快照保留旧版本，快照也不可再读取
+        """
+        self._graph._snapshots.discard(self)
+        self._overlay = None
+        self._graph = None
+
+    def get_neighbors(self, node_id):
+        # 先读原图再查覆盖层：原图总是先写覆盖层再换上新列表，这一顺序保证并发修改时也能读到旧版本
+        live = self._graph.adj_list.get(node_id)
+        old = self._overlay.get(node_id)
+        if old is not None:
+            return [] if old is _ABSENT else old
+        return live if live is not None else []
+
+    def has_node(self, node_id):
+        live = node_id in self._graph.adj_list
+        old = self._overlay.get(node_id)
+        if old is not None:
+            return old is not _ABSENT
+        return live
+
+    def has_edge(self, u, v):
+        return v in self.get_neighbors(u)
+
+    def get_all_nodes(self):
+        live = list(self._graph.adj_list)
+        overlay = dict(self._overlay)
+        nodes = [n for n in live if overlay.get(n) is not _ABSENT]
+        live_set = set(live)
+        nodes.extend(n for n, old in overlay.items() if old is not _ABSENT and n not in live_set)
+        return nodes
+
+    def adjacency_items(self):
+        for node_id in self.get_all_nodes():
+            yield node_id, self.get_neighbors(node_id)
+
+    def compact(self):
+        if self._compact is None:
+            self._compact = CompactGraph(self)
+        return self._compact
+
+
 class Graph:
     """
     无向图邻接表数据结构
     存储结构: dict[node_id] = list[neighbor_ids]
     """
+    # 批量删除时，度数超过该值的邻居整表重建一次，其余逐条 list.remove (C 层实现，短表上更快)
+    BULK_REBUILD_DEGREE = 64
+
     def __init__(self):
         # 核心数据结构一：基于字典与列表底层的自实现无向图邻接表
         self.adj_list = {}
+        # 变更监听器: fn(event, u, v)，event 取 "add_edge" / "remove_edge" / "remove_node"
+        # remove_node 时 u 为被删节点，v 为其删除前的邻居列表
+        self._listeners = []
+        # 版本号: 每次拓扑实际变化后递增，派生结构据此判断是否需要重建
+        self.version = 0
+        self._compact = None
+        # 活动快照 (弱引用，快照被回收后自动失效)；_owned 记录自最近一次快照以来已换成新副本的节点
+        self._snapshots = weakref.WeakSet()
+        self._owned = set()
+
+    def snapshot(self):
+        """
+        冻结当前版本，返回只读的 GraphSnapshot；O(1) 创建，不复制邻接表
+
+        Returns:
+            GraphSnapshot: 不受此后修改影响的只读视图
+        """
+        snap = GraphSnapshot(self)
+        self._snapshots.add(snap)
+        self._owned = set()
+        return snap
+
+    def _before_change(self, node_id):
+        """
+        修改 node_id 的邻接列表前调用：若存在活动快照，把旧列表交给快照保存并换上新副本
+        """
+        if not self._snapshots or node_id in self._owned:
+            return
+        old = self.adj_list.get(node_id)
+        for snap in list(self._snapshots):
+            snap._preserve(node_id, old)
+        if old is not None:
+            self.adj_list[node_id] = list(old)
+        self._owned.add(node_id)
+
+    def adjacency_items(self):
+        return self.adj_list.items()
+
+    def compact(self):
+        """
+        获取当前拓扑的 CSR 快照；图未变化时复用上一次的结果
+
+        Returns:
+            CompactGraph: 以稠密整数编号表示的只读邻接结构
+        """
+        if self._compact is None or self._compact.version != self.version:
+            self._compact = CompactGraph(self)
+        return self._compact
+
+    def add_listener(self, fn):
+        """
+        注册拓扑变更监听器，每次边或节点实际发生变化后回调
+
+        Args:
+            fn (callable): fn(event, u, v)
+        """
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, event, u, v):
+        for fn in self._listeners:
+            fn(event, u, v)
 
     def add_node(self, node_id):
         """
@@ -22,19 +217,72 @@ class Graph:
             node_id (str): 节点的唯一标识符
         """
         if node_id not in self.adj_list:
+            self._before_change(node_id)
             self.adj_list[node_id] = []
+            self.version += 1
 
     def remove_node(self, node_id):
         """
         从图中移除一个节点，并清理所有与之相连的边
         """
         if node_id in self.adj_list:
+            former = list(self.adj_list[node_id])
             # 先从其所有邻居的邻接表中移除该节点
-            for neighbor in list(self.adj_list[node_id]):
+            for neighbor in former:
                 if neighbor in self.adj_list and node_id in self.adj_list[neighbor]:
+                    self._before_change(neighbor)
                     self.adj_list[neighbor].remove(node_id)
+            self._before_change(node_id)
             # 最后删除该节点本身
             del self.adj_list[node_id]
+            self.version += 1
+            if self._listeners:
+                self._notify("remove_node", node_id, former)
+
+    def remove_nodes(self, node_ids):
+        """
+        批量移除节点及其全部关系
+
+        被删节点之间的边不再逐条处理；大度数邻居 (可能连着大量被删节点) 的邻接表整体只重建一次，
+        避免逐个 remove_node 时对同一长列表反复执行 O(deg) 的 list.remove；监听器在全部删除完成后才收到通知。
+
+        Args:
+            node_ids (iterable): 待删除的节点 ID，不存在的会被忽略
+
+        Returns:
+            dict: 实际删除的节点 → 其删除前的邻居列表
+        """
+        purge = {n for n in node_ids if n in self.adj_list}
+        if not purge:
+            return {}
+        former = {n: self.adj_list[n] for n in purge}
+        adj = self.adj_list
+        cow = bool(self._snapshots)
+        rebuilt = set()
+        for n, nbrs in former.items():
+            for x in nbrs:
+                if x in purge or x in rebuilt:
+                    continue
+                # 与 remove_node 相同的防护：悬空或不对称的邻接不会使批量删除中途失败
+                x_nbrs = adj.get(x)
+                if x_nbrs is None or n not in x_nbrs:
+                    continue
+                if cow:
+                    self._before_change(x)
+                if len(adj[x]) > self.BULK_REBUILD_DEGREE:
+                    # 大度数邻居 (如超级节点) 可能连着许多被删节点，整表只重建一次
+                    adj[x] = [y for y in adj[x] if y not in purge]
+                    rebuilt.add(x)
+                else:
+                    adj[x].remove(n)
+        for n in purge:
+            self._before_change(n)
+            del self.adj_list[n]
+        self.version += 1
+        if self._listeners:
+            for n, nbrs in former.items():
+                self._notify("remove_node", n, nbrs)
+        return former
 
     def add_edge(self, u, v):
         """
@@ -48,10 +296,19 @@ class Graph:
         self.add_node(u)
         self.add_node(v)
         # 禁止直接调用库，需自主判定重边以防止回环异常
+        added = False
         if v not in self.adj_list[u]:
+            self._before_change(u)
             self.adj_list[u].append(v)
+            added = True
         if u not in self.adj_list[v]:
+            self._before_change(v)
             self.adj_list[v].append(u)
+            added = True
+        if added:
+            self.version += 1
+            if self._listeners:
+                self._notify("add_edge", u, v)
 
     def remove_edge(self, u, v):
         """
@@ -66,13 +323,104 @@ class Graph:
         """
         removed = False
         if u in self.adj_list and v in self.adj_list[u]:
+            self._before_change(u)
             self.adj_list[u].remove(v)
             removed = True
         if v in self.adj_list and u in self.adj_list[v]:
+            self._before_change(v)
             self.adj_list[v].remove(u)
             removed = True
+        if removed:
+            self.version += 1
+            if self._listeners:
+                self._notify("remove_edge", u, v)
+        return removed
+
+    def remove_edges(self, pairs):
+        """
+        批量删除无向边，每个受影响端点的邻接表只重建一次
+
+        Args:
+            pairs (iterable): (u, v) 二元组
+
+        Returns:
+            list[tuple]: 实际存在并被删除的边
+        """
+        drop = {}
+        for u, v in pairs:
+            if u != v:
+                drop.setdefault(u, set()).add(v)
+                drop.setdefault(v, set()).add(u)
+        removed = []
+        seen = set()
+        for u, targets in drop.items():
+            nbrs = self.adj_list.get(u)
+            if not nbrs:
+                continue
+            kept = [v for v in nbrs if v not in targets]
+            if len(kept) == len(nbrs):
+                continue
+            for v in nbrs:
+                # 两个端点各处理一次，同一条边只记录一次
+                if v in targets and (v, u) not in seen:
+                    seen.add((u, v))
+                    removed.append((u, v))
+            self._before_change(u)
+            self.adj_list[u] = kept
+        if removed:
+            self.version += 1
+            if self._listeners:
+                for u, v in removed:
+                    self._notify("remove_edge", u, v)
         return removed
 
+    def set_neighbors(self, node_id, new_ids):
+        """
+        将节点的好友列表整体替换为 new_ids，只增删有差异的边
+
+        与 "逐条 remove_edge 清空后再逐条 add_edge" 相比，自身邻接表只重建一次，
+        保留的好友不做任何改动；监听器只收到实际增删的边。
+
+        Args:
+            node_id (str): 节点 ID (不存在时自动新建)
+            new_ids (iterable): 新的好友 ID，重复项与自身会被忽略
+
+        Returns:
+            tuple[list, list]: (新增的好友, 删除的好友)
+        """
+        self.add_node(node_id)
+        current = self.adj_list[node_id]
+        target = [n for n in dict.fromkeys(new_ids) if n != node_id]
+        target_set = set(target)
+        current_set = set(current)
+        removed = [n for n in current if n not in target_set]
+        added = [n for n in target if n not in current_set]
+        if not removed and not added:
+            return added, removed
+
+        for n in removed:
+            nbrs = self.adj_list.get(n)
+            if nbrs is not None and node_id in nbrs:
+                self._before_change(n)
+                self.adj_list[n].remove(node_id)
+        for n in added:
+            if n not in self.adj_list:
+                self._before_change(n)
+                self.adj_list[n] = []
+            if node_id not in self.adj_list[n]:
+                self._before_change(n)
+                self.adj_list[n].append(node_id)
+        self._before_change(node_id)
+        self.adj_list[node_id] = [n for n in current if n in target_set] + added
+        self.version += 1
+
+        if self._listeners:
+            for n in removed:
+                self._notify("remove_edge", node_id, n)
+            for n in added:
+                self._notify("add_edge", node_id, n)
+        return added, removed
+
     def has_node(self, node_id):
         """
         判断节点是否存在于图中。
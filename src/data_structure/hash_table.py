@@ -2,28 +2,142 @@
 自定义哈希表功能模块
 
 基于拉链法（链地址法）解决哈希冲突问题。
-提供平均 O(1) 的用户信息增删改查支持。
+元素数超过容量的 3/4 时自动扩容一倍，保证链长有界，提供平均 O(1) 的用户信息增删改查支持。
+snapshot() 可冻结当前版本的只读视图 (写时复制，代价与此后的修改量成正比)。
 """
 
+import weakref
+
+# 快照覆盖层中的占位符: 该键在快照版本中不存在
+_ABSENT = object()
+
+
 class Node:
     """
     单链表节点（用于解决哈希冲突的拉链法桶结构）
     """
+    __slots__ = ("key", "value", "next")
+
     def __init__(self, key, value):
         self.key = key
         self.value = value
         self.next = None
 
 
+class HashTableSnapshot:
+    """
+    冻结某一版本的只读哈希表视图 (写时复制)
+
+    创建时不复制任何数据；原表此后每次 put / remove 前，先把该键的旧值交给快照保存。
+    档案值本身不可变 (整体替换)，因此未修改的键与原表共享同一份记录。
+    """
+    def __init__(self, table):
+        self._table = table
+        self._overlay = {}
+
+    def _preserve(self, key, value):
+        if key not in self._overlay:
+            self._overlay[key] = _ABSENT if value is None else value
+
+    @property
+    def changed_keys(self):
+        return len(self._overlay)
+
+    def release(self):
+        self._table._snapshots.discard(self)
+        self._overlay = None
+        self._table = None
+
+    def get(self, key):
+        # 先读原表再查覆盖层，与原表"先写覆盖层再修改"的顺序配合，并发修改时仍读到旧值
+        live = self._table.get(key)
+        old = self._overlay.get(key)
+        if old is not None:
+            return None if old is _ABSENT else old
+        return live
+
+    def get_all_keys(self):
+        live = self._table.get_all_keys()
+        overlay = dict(self._overlay)
+        keys = [k for k in live if overlay.get(k) is not _ABSENT]
+        live_set = set(live)
+        keys.extend(k for k, old in overlay.items() if old is not _ABSENT and k not in live_set)
+        return keys
+
+    def __len__(self):
+        return len(self.get_all_keys())
+
+
 class HashTable:
     """
     自研哈希表数据结构 (缓存管理器)
-    核心机制: 取模运算 + 链地址法防冲突
+    核心机制: 取模运算 + 链地址法防冲突 + 按装载因子扩容
     """
+    LOAD_FACTOR = 0.75
+
     def __init__(self, capacity=100):
         # 核心数据结构二：哈希表，采用链地址法解决冲突
         self.capacity = capacity
         self.table = [None] * capacity
+        self.size = 0
+        # 变更监听器: fn(event, key, old_value, new_value)，event 取 "put" / "remove"
+        # 供兴趣索引、推荐缓存等派生结构在档案变化时增量维护
+        self._listeners = []
+        self._snapshots = weakref.WeakSet()
+
+    def snapshot(self):
+        """
+        冻结当前版本，返回只读的 HashTableSnapshot；O(1) 创建，不复制任何记录
+        """
+        snap = HashTableSnapshot(self)
+        self._snapshots.add(snap)
+        return snap
+
+    def _before_change(self, key, old_value):
+        for snap in list(self._snapshots):
+            snap._preserve(key, old_value)
+
+    def add_listener(self, fn):
+        """
+        注册变更监听器，每次 put / remove 成功后回调
+
+        Args:
+            fn (callable): fn(event, key, old_value, new_value)
+        """
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _notify(self, event, key, old_value, new_value):
+        for fn in self._listeners:
+            fn(event, key, old_value, new_value)
+
+    def __len__(self):
+        return self.size
+
+    def _resize(self, new_capacity):
+        """
+        扩容并把全部节点重新散列到新的桶数组
+
+        无活动快照时节点对象原样复用；存在快照时改为复制节点，
+        旧桶数组保持完整，正在遍历旧链表的快照读者不受影响。
+        """
+        table = [None] * new_capacity
+        copy_nodes = bool(self._snapshots)
+        for head in self.table:
+            curr = head
+            while curr:
+                nxt = curr.next
+                idx = hash(str(curr.key)) % new_capacity
+                node = Node(curr.key, curr.value) if copy_nodes else curr
+                node.next = table[idx]
+                table[idx] = node
+                curr = nxt
+        self.table = table
+        self.capacity = new_capacity
 
     def _hash(self, key):
         """
@@ -43,21 +157,35 @@ class HashTable:
 
         Args:
             key (str): 用户 ID (作为主键)
-            value (dict): 用户信息的字典
+            value (UserRecord): 用户档案记录
         """
         idx = self._hash(key)
         if not self.table[idx]:
+            if self._snapshots:
+                self._before_change(key, None)
             self.table[idx] = Node(key, value)
         else:
             curr = self.table[idx]
             while curr:
                 if str(curr.key) == str(key):
+                    old_value = curr.value
+                    if self._snapshots:
+                        self._before_change(key, old_value)
                     curr.value = value
+                    if self._listeners:
+                        self._notify("put", key, old_value, value)
                     return
                 if not curr.next:
                     break
                 curr = curr.next
+            if self._snapshots:
+                self._before_change(key, None)
             curr.next = Node(key, value)
+        self.size += 1
+        if self.size > self.capacity * self.LOAD_FACTOR:
+            self._resize(self.capacity * 2)
+        if self._listeners:
+            self._notify("put", key, None, value)
 
     def get(self, key):
         """
@@ -67,10 +195,11 @@ class HashTable:
             key (str): 用户 ID
 
         Returns:
-            dict | None: 对应的用户信息，若无则返回 None
+            UserRecord | None: 对应的用户档案记录，若无则返回 None
         """
-        idx = self._hash(key)
-        curr = self.table[idx]
+        # 取一次桶数组引用并按其长度取模: 扩容换表期间的快照读者也能读到一致的链表
+        table = self.table
+        curr = table[hash(str(key)) % len(table)]
         while curr:
             if str(curr.key) == str(key):
                 return curr.value
@@ -86,15 +215,55 @@ class HashTable:
         prev = None
         while curr:
             if str(curr.key) == str(key):
+                if self._snapshots:
+                    self._before_change(curr.key, curr.value)
                 if prev:
                     prev.next = curr.next
                 else:
                     self.table[idx] = curr.next
+                self.size -= 1
+                if self._listeners:
+                    self._notify("remove", curr.key, curr.value, None)
                 return True
             prev = curr
             curr = curr.next
         return False
 
+    def remove_many(self, keys):
+        """
+        批量移除键值对：按桶分组，每条链只遍历并重新链接一次
+
+        Args:
+            keys (iterable): 待移除的用户 ID，不存在的会被忽略
+
+        Returns:
+            list[tuple]: 实际移除的 (键, 旧值)
+        """
+        buckets = {}
+        for key in keys:
+            buckets.setdefault(self._hash(key), set()).add(str(key))
+        removed = []
+        for idx, targets in buckets.items():
+            curr = self.table[idx]
+            prev = None
+            while curr:
+                if str(curr.key) in targets:
+                    if self._snapshots:
+                        self._before_change(curr.key, curr.value)
+                    if prev:
+                        prev.next = curr.next
+                    else:
+                        self.table[idx] = curr.next
+                    removed.append((curr.key, curr.value))
+                else:
+                    prev = curr
+                curr = curr.next
+        self.size -= len(removed)
+        if self._listeners:
+            for key, value in removed:
+                self._notify("remove", key, value, None)
+        return removed
+
     def get_all_keys(self):
         """
         获取缓存在哈希表中的全量独立 Key 集合
@@ -2,6 +2,8 @@
 定长最小堆算法功能模块
 
 提供严格 O(log N) 的节点上浮/下沉能力，用于社交网络扩展功能的 Top-K 数据截断推荐。
+IndexedMinHeap 额外记录每个键在堆中的位置，支持 O(log N) 的降低优先级 (decrease-key)，
+供 Dijkstra 最短路使用：每个节点在堆中至多一项，不会堆积过期条目。
 """
 
 class MinHeap:
@@ -62,3 +64,110 @@ class MinHeap:
         if smallest != idx:
             self.heap[idx], self.heap[smallest] = self.heap[smallest], self.heap[idx]
             self._sift_down(smallest)
+
+
+class IndexedMinHeap:
+    """
+    带位置索引的最小堆，每个键至多出现一次
+    存储的数据格式: list [priority, key]，pos 记录 key → 堆数组下标
+    """
+    def __init__(self):
+        self.heap = []
+        self.pos = {}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, key):
+        return key in self.pos
+
+    def priority(self, key):
+        """
+        Returns:
+            float | None: 键当前的优先级，不在堆中时返回 None
+        """
+        idx = self.pos.get(key)
+        return None if idx is None else self.heap[idx][0]
+
+    def push(self, key, priority):
+        """
+        压入新键；键已在堆中时等价于 decrease_key
+
+        Returns:
+            bool: 是否压入或降低了优先级
+        """
+        if key in self.pos:
+            return self.decrease_key(key, priority)
+        self.heap.append([priority, key])
+        self.pos[key] = len(self.heap) - 1
+        self._sift_up(len(self.heap) - 1)
+        return True
+
+    def decrease_key(self, key, priority):
+        """
+        把键的优先级降低为 priority，并上浮到新位置
+
+        Returns:
+            bool: 新优先级更小并已更新时返回 True，否则保持原样返回 False
+        """
+        idx = self.pos[key]
+        if priority >= self.heap[idx][0]:
+            return False
+        self.heap[idx][0] = priority
+        self._sift_up(idx)
+        return True
+
+    def pop(self):
+        """
+        弹出优先级最小的键
+
+        Returns:
+            tuple | None: (优先级, 键)；堆为空时返回 None
+        """
+        if not self.heap:
+            return None
+        root = self.heap[0]
+        last = self.heap.pop()
+        del self.pos[root[1]]
+        if self.heap:
+            self.heap[0] = last
+            self.pos[last[1]] = 0
+            self._sift_down(0)
+        return root[0], root[1]
+
+    def _sift_up(self, idx):
+        """
+        内部辅助方法：元素上浮 (空穴法，沿途只移动父节点并更新其位置)
+        """
+        heap, pos = self.heap, self.pos
+        item = heap[idx]
+        while idx > 0:
+            parent = (idx - 1) // 2
+            if item[0] >= heap[parent][0]:
+                break
+            heap[idx] = heap[parent]
+            pos[heap[idx][1]] = idx
+            idx = parent
+        heap[idx] = item
+        pos[item[1]] = idx
+
+    def _sift_down(self, idx):
+        """
+        内部辅助方法：元素下沉
+        """
+        heap, pos = self.heap, self.pos
+        n = len(heap)
+        item = heap[idx]
+        while True:
+            child = 2 * idx + 1
+            if child >= n:
+                break
+            if child + 1 < n and heap[child + 1][0] < heap[child][0]:
+                child += 1
+            if item[0] <= heap[child][0]:
+                break
+            heap[idx] = heap[child]
+            pos[heap[idx][1]] = idx
+            idx = child
+        heap[idx] = item
+        pos[item[1]] = idx
@@ -0,0 +1,72 @@
+﻿"""
+用户ID注册表模块
+
+外部数据中的用户ID均为字符串；全图类算法 (三角形计数、PageRank、社区发现等) 在内部
+改用稠密整数编号 0..n-1，可直接作为数组下标，省去反复的字符串哈希与字典查找。
+字符串只在读写文件、界面展示等边界处与整数编号互相转换。
+"""
+
+
+def uid_sort_key(uid):
+    """
+    用户ID的统一排序键：纯数字ID按数值升序排在前，其余按字典序排在后
+
+    全系统 (文件回写、界面下拉框、二度人脉分页等) 共用这一排序口径。
+    """
+    uid_str = str(uid)
+    if uid_str.isdigit():
+        return (0, int(uid_str))
+    return (1, uid_str)
+
+
+class IdRegistry:
+    """
+    外部字符串ID ↔ 稠密整数编号的双向映射
+
+    Attributes:
+        ids (list): 编号 → 外部ID
+        index (dict): 外部ID → 编号
+    """
+    def __init__(self, ids=()):
+        self.ids = []
+        self.index = {}
+        for uid in ids:
+            self.intern(uid)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, uid):
+        return uid in self.index
+
+    def intern(self, uid):
+        """
+        登记外部ID并返回其编号；已登记的ID直接返回原编号
+        """
+        i = self.index.get(uid)
+        if i is None:
+            i = len(self.ids)
+            self.ids.append(uid)
+            self.index[uid] = i
+        return i
+
+    def get(self, uid, default=None):
+        return self.index.get(uid, default)
+
+    def external(self, i):
+        return self.ids[i]
+
+    def ranks(self):
+        """
+        按 uid_sort_key 计算每个编号的排序名次
+
+        每个ID只解析一次排序键，此后的排序与比较都是整数运算。
+
+        Returns:
+            list[int]: 编号 → 名次
+        """
+        order = sorted(range(len(self.ids)), key=lambda i: uid_sort_key(self.ids[i]))
+        rank = [0] * len(order)
+        for r, i in enumerate(order):
+            rank[i] = r
+        return rank
@@ -0,0 +1,236 @@
+﻿"""
+兴趣标签 MinHash 局部敏感哈希 (LSH) 索引模块
+
+为每名用户的兴趣标签集合计算 MinHash 签名，并按"分段 (band)"写入哈希桶。
+两名用户的 Jaccard 相似度越高，至少一段签名完全相同的概率越大，
+因此只需检查与目标同桶的少量候选，即可在亚线性时间内找到兴趣相近的用户，
+再以精确 Jaccard 复核打分。
+
+召回率 / 速度可通过 bands 与 rows (= num_perm / bands) 调节：
+相似度阈值约为 (1 / bands) ^ (1 / rows)，段数越多召回越高、候选越多。
+"""
+
+import sys
+import os
+import zlib
+import threading
+from collections import OrderedDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_structure.id_registry import uid_sort_key
+
+# 标签集合签名缓存的容量 (不同标签组合数)；超出后淘汰最久未使用的组合
+SET_CACHE_SIZE = 4096
+
+# 梅森素数 2^61 - 1，作为通用哈希族 (a * x + b) mod P 的模数
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def parse_tags(interests):
+    """将 '编程;篮球' 形式的兴趣串拆分为标签集合 (与 get_interest_similarity 口径一致)"""
+    return frozenset(interests.split(";")) if interests else frozenset()
+
+
+def jaccard(tags_a, tags_b):
+    if not tags_a or not tags_b:
+        return 0.0
+    return len(tags_a & tags_b) / len(tags_a | tags_b)
+
+
+class MinHashLSH:
+    """
+    MinHash 签名 + 分段 LSH 索引
+
+    Attributes:
+        num_perm (int): 签名长度 (哈希函数个数)
+        bands (int): 分段数
+        rows (int): 每段包含的签名行数
+    """
+    def __init__(self, num_perm=64, bands=16, seed=42, set_cache_size=SET_CACHE_SIZE):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # 由种子确定的线性同余序列生成哈希参数，保证跨进程签名一致
+        params = []
+        state = seed or 1
+        for _ in range(num_perm):
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            a = state % (_MERSENNE_PRIME - 1) + 1
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            b = state % _MERSENNE_PRIME
+            params.append((a, b))
+        self._params = params
+
+        self._tag_cache = {}     # 标签 → 该标签在全部哈希函数下的取值向量
+        # 标签集合 → (签名, 各段键)；热门标签组合大量重复，LRU 保留最近使用的组合
+        self._set_cache = OrderedDict()
+        self.set_cache_size = set_cache_size
+        # 多个读者可能同时查询，LRU 顺序调整与写入由互斥锁保护
+        self._lock = threading.Lock()
+        self._buckets = [dict() for _ in range(bands)]  # 每段: 段签名 → 用户集合
+        self._signatures = {}    # 用户ID → 签名
+        self._tags = {}          # 用户ID → 标签集合 (用于精确复核)
+
+    @classmethod
+    def for_threshold(cls, threshold, num_perm=64, seed=42):
+        """
+        按目标相似度阈值挑选分段方案：在 num_perm 的约数中选取 (1/b)^(1/r) 最接近阈值的组合
+        """
+        best = None
+        for b in range(1, num_perm + 1):
+            if num_perm % b:
+                continue
+            r = num_perm // b
+            err = abs((1.0 / b) ** (1.0 / r) - threshold)
+            if best is None or err < best[0]:
+                best = (err, b)
+        return cls(num_perm=num_perm, bands=best[1], seed=seed)
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, user_id):
+        return user_id in self._signatures
+
+    def _tag_vector(self, tag):
+        vec = self._tag_cache.get(tag)
+        if vec is None:
+            h = zlib.crc32(tag.encode("utf-8"))
+            p = _MERSENNE_PRIME
+            vec = tuple((a * h + b) % p for a, b in self._params)
+            self._tag_cache[tag] = vec
+        return vec
+
+    def signature(self, tags):
+        """
+        计算标签集合的 MinHash 签名 (逐位取各标签哈希向量的最小值)
+
+        标签词表远小于用户数，按标签缓存哈希向量后每名用户只需一次逐位 min。
+        """
+        if not tags:
+            return None
+        vecs = [self._tag_vector(t) for t in tags]
+        if len(vecs) == 1:
+            return vecs[0]
+        return tuple(map(min, *vecs))
+
+    def _band_keys(self, sig):
+        r = self.rows
+        return [sig[i * r:(i + 1) * r] for i in range(self.bands)]
+
+    def _signature_and_keys(self, tags):
+        with self._lock:
+            cached = self._set_cache.get(tags)
+            if cached is not None:
+                self._set_cache.move_to_end(tags)
+                return cached
+        sig = self.signature(tags)
+        cached = (sig, self._band_keys(sig) if sig is not None else None)
+        with self._lock:
+            self._set_cache[tags] = cached
+            while len(self._set_cache) > self.set_cache_size:
+                self._set_cache.popitem(last=False)
+        return cached
+
+    def insert(self, user_id, interests):
+        """
+        写入 (或覆盖) 一名用户的兴趣标签；无兴趣标签的用户不进入索引
+        """
+        if user_id in self._signatures:
+            self.remove(user_id)
+        tags = parse_tags(interests)
+        sig, keys = self._signature_and_keys(tags)
+        if sig is None:
+            return
+        self._signatures[user_id] = sig
+        self._tags[user_id] = tags
+        for band, key in zip(self._buckets, keys):
+            bucket = band.get(key)
+            if bucket is None:
+                band[key] = {user_id}
+            else:
+                bucket.add(user_id)
+
+    def remove(self, user_id):
+        sig = self._signatures.pop(user_id, None)
+        if sig is None:
+            return False
+        del self._tags[user_id]
+        for band, key in zip(self._buckets, self._band_keys(sig)):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.discard(user_id)
+                if not bucket:
+                    del band[key]
+        return True
+
+    def candidates(self, interests=None, user_id=None):
+        """
+        取出与给定兴趣 (或索引内某用户) 至少一段签名相同的候选用户，不做复核
+        """
+        if user_id is not None and user_id in self._tags:
+            tags = self._tags[user_id]
+        else:
+            tags = parse_tags(interests)
+        sig, keys = self._signature_and_keys(tags)
+        if sig is None:
+            return set()
+        found = set()
+        for band, key in zip(self._buckets, keys):
+            bucket = band.get(key)
+            if bucket:
+                found.update(bucket)
+        found.discard(user_id)
+        return found
+
+    def query(self, interests=None, user_id=None, k=10, threshold=0.0):
+        """
+        近似高相似度邻居查询：LSH 取候选后以精确 Jaccard 复核并排序
+
+        Args:
+            interests (str): 查询兴趣串；与 user_id 二选一
+            user_id (str): 以索引内某用户的兴趣作为查询，结果中排除其本人
+            k (int): 最多返回条数，None 表示不截断
+            threshold (float): 复核后的最低相似度
+
+        Returns:
+            list[tuple[float, str]]: 按相似度降序 (同分按统一ID口径升序) 的 (Jaccard 相似度, 用户ID)
+        """
+        if user_id is not None and user_id in self._tags:
+            tags = self._tags[user_id]
+        else:
+            tags = parse_tags(interests)
+        scored = []
+        for uid in self.candidates(interests, user_id):
+            sim = jaccard(tags, self._tags[uid])
+            if sim > 0 and sim >= threshold:
+                scored.append((sim, uid))
+        scored.sort(key=lambda item: (-item[0], uid_sort_key(item[1])))
+        return scored if k is None else scored[:k]
+
+    def build(self, hash_table):
+        """
+        从哈希表全量构建索引 (通常在数据加载完成后调用一次)
+        """
+        for uid in hash_table.get_all_keys():
+            info = hash_table.get(uid)
+            if info:
+                self.insert(uid, info["interests"])
+        return self
+
+    def attach(self, hash_table):
+        """
+        全量构建并订阅哈希表变更，此后档案的新增、修改与删除都会增量同步到索引
+        """
+        self.build(hash_table)
+        hash_table.add_listener(self.on_change)
+        return self
+
+    def on_change(self, event, key, old_value, new_value):
+        if event == "remove":
+            self.remove(key)
+        elif old_value is None or old_value["interests"] != new_value["interests"]:
+            self.insert(key, new_value["interests"])
@@ -0,0 +1,402 @@
+﻿"""
+磁盘分片邻接存储模块
+
+关系网络超出内存时，邻接表改为存放在磁盘上的分片文件中，按需经内存映射 (mmap) 读取：
+1. 节点编号 i 归属分片 i % shards，分片内序号为 i // shards
+2. 每个分片两个文件：.idx 为 int64 行偏移，.adj 为 int32 邻居编号 (CSR 布局)
+3. 最近访问的节点邻居表保留在有界 LRU 缓存中，缓存容量按邻居条目数计，超级节点不会挤爆内存
+
+常驻内存的只有用户ID列表与缓存，页面由操作系统按需换入换出。
+ShardedGraph 提供与 Graph 相同的只读接口，BFS、二度人脉等算法无需修改即可直接运行；
+compact() 返回直接读取分片文件的 CSR 视图，不会把整张图装入内存。
+需要整图连续邻居数组的算法 (PageRank、介数、距离分布等) 不支持分片存储，访问时明确报错。
+"""
+
+import sys
+import os
+import json
+import mmap
+import threading
+from array import array
+from collections import OrderedDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_structure.id_registry import IdRegistry
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+NODES_FILE = "nodes.txt"
+
+
+def _shard_paths(directory, k):
+    base = os.path.join(directory, f"shard_{k:03d}")
+    return base + ".idx", base + ".adj"
+
+
+def _map_array(path, typecode):
+    """
+    以只读方式映射整数数组文件；空文件无法 mmap，返回空视图
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None, memoryview(array(typecode))
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mm, memoryview(mm).cast(typecode)
+
+
+class ShardedCSRView:
+    """
+    分片存储上的 CSR 只读视图，接口与 CompactGraph 一致
+
+    行偏移 indptr 只占 O(n) 内存，首次访问时由各分片的 .idx 汇总得到；
+    neighbors(i) 每次直接从内存映射的分片读取一行，不经过 LRU 缓存。
+    分片按 i % shards 交错存放，不存在整图连续的邻居数组，访问 indices 会抛出 ValueError。
+
+    Attributes:
+        registry (IdRegistry): 外部ID ↔ 编号映射
+        version (int): 存储版本号 (只读存储恒为 0)
+    """
+    def __init__(self, store):
+        self._store = store
+        self.registry = store.registry
+        self.version = store.version
+        self._indptr = None
+
+    def __len__(self):
+        return len(self.registry)
+
+    @property
+    def nodes(self):
+        return self.registry.ids
+
+    @property
+    def indptr(self):
+        if self._indptr is None:
+            indptr = array("q", [0])
+            total = 0
+            for i in range(len(self.registry)):
+                total += self.degree(i)
+                indptr.append(total)
+            self._indptr = indptr
+        return self._indptr
+
+    @property
+    def indices(self):
+        raise ValueError("分片存储不提供整图连续的邻居数组，该算法需先把关系网络装入内存 (不要使用 --graph-store)")
+
+    def neighbors(self, i):
+        return array("i", self._store._read(i))
+
+    def degree(self, i):
+        offsets = self._store._offsets_of(i)
+        local = i // self._store.shards
+        return offsets[local + 1] - offsets[local]
+
+
+def _prepare_directory(directory, shards):
+    if shards <= 0:
+        raise ValueError("分片数必须为正整数")
+    os.makedirs(directory, exist_ok=True)
+    # 先删除旧的元数据，构建中途失败时目录不会被误当作完整的存储
+    meta_path = os.path.join(directory, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+
+class ShardedGraph:
+    """
+    只读的磁盘分片邻接表
+
+    Attributes:
+        directory (str): 存储目录
+        shards (int): 分片数
+        registry (IdRegistry): 外部ID ↔ 编号映射
+        cache_size (int): LRU 缓存最多保留的邻居条目总数
+        hits / misses / evictions (int): 缓存命中、未命中与淘汰次数
+    """
+    def __init__(self, directory, cache_size=1_000_000):
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"不支持的分片存储格式: {meta.get('format')}")
+        self.directory = directory
+        self.shards = meta["shards"]
+        self.edges = meta["edges"]
+        with open(os.path.join(directory, NODES_FILE), "r", encoding="utf-8") as f:
+            self.registry = IdRegistry(line.rstrip("\n") for line in f)
+        self._maps = []
+        self._offsets = []
+        self._values = []
+        for k in range(self.shards):
+            idx_path, adj_path = _shard_paths(directory, k)
+            for path, typecode, views in ((idx_path, "q", self._offsets), (adj_path, "i", self._values)):
+                mm, view = _map_array(path, typecode)
+                if mm is not None:
+                    self._maps.append(mm)
+                views.append(view)
+
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cached_entries = 0
+        # 多个读者可能同时查询，缓存的调整由互斥锁保护
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 只读存储的版本号恒定，派生结构 (如 compact()) 只需构建一次
+        self.version = 0
+        self._compact = None
+        self._closed = False
+
+    @classmethod
+    def build(cls, directory, ids, pairs_factory, shards=16, cache_size=1_000_000):
+        """
+        流式构建分片存储
+
+        第一遍扫描只统计度数，据此算出每个节点在分片文件中的位置；
+        第二遍把邻居编号直接写入内存映射的分片文件；最后逐个分片去除重复关系。
+
+        Args:
+            directory (str): 输出目录 (不存在时自动创建)
+            ids (iterable): 全部用户ID，决定节点编号
+            pairs_factory (callable): 每次调用返回一个新的 (行号, u, v) 迭代器，需要扫描两遍
+            shards (int): 分片数
+
+        Returns:
+            ShardedGraph: 打开后的存储
+
+        Raises:
+            ValueError: 关系引用了不存在的用户
+        """
+        _prepare_directory(directory, shards)
+        registry = IdRegistry(ids)
+        index = registry.index
+        n = len(registry)
+
+        degree = array("q", bytes(8 * n))
+        for line_no, u, v in pairs_factory():
+            iu = index.get(u)
+            iv = index.get(v)
+            if iu is None or iv is None:
+                raise ValueError(f"好友关系引用了不存在的用户(第{line_no}行): {u},{v}")
+            degree[iu] += 1
+            if iv != iu:
+                degree[iv] += 1
+
+        # 每个节点在所属分片 .adj 文件中的写入位置
+        cursor = array("q", bytes(8 * n))
+        totals = [0] * shards
+        for i in range(n):
+            k = i % shards
+            cursor[i] = totals[k]
+            totals[k] += degree[i]
+        starts = array("q", cursor)
+
+        files = []
+        views = []
+        try:
+            for k in range(shards):
+                _, adj_path = _shard_paths(directory, k)
+                f = open(adj_path, "w+b")
+                files.append(f)
+                if totals[k]:
+                    f.truncate(4 * totals[k])
+                    mm = mmap.mmap(f.fileno(), 0)
+                    files.append(mm)
+                    views.append(memoryview(mm).cast("i"))
+                else:
+                    views.append(None)
+
+            for _, u, v in pairs_factory():
+                iu = index[u]
+                iv = index[v]
+                views[iu % shards][cursor[iu]] = iv
+                cursor[iu] += 1
+                if iv != iu:
+                    views[iv % shards][cursor[iv]] = iu
+                    cursor[iv] += 1
+        finally:
+            for view in views:
+                if view is not None:
+                    view.release()
+            for f in reversed(files):
+                f.close()
+
+        entries = 0
+        for k in range(shards):
+            idx_path, adj_path = _shard_paths(directory, k)
+            raw = array("i")
+            with open(adj_path, "rb") as f:
+                raw.frombytes(f.read())
+            # 去除分片内的重复关系，保留首次出现的顺序 (与 Graph.add_edge 逐条加边的结果一致)
+            rows = (dict.fromkeys(raw[starts[i]:starts[i] + degree[i]]) for i in range(k, n, shards))
+            entries += cls._write_shard(directory, k, rows)
+        cls._write_meta(directory, registry.ids, shards, entries)
+        return cls(directory, cache_size)
+
+    @classmethod
+    def from_graph(cls, graph, directory, shards=16, cache_size=1_000_000):
+        """
+        将内存中的 Graph (或其快照) 原样写出为分片存储，邻居顺序保持不变
+        """
+        _prepare_directory(directory, shards)
+        cg = graph.compact()
+        n = len(cg)
+        entries = 0
+        for k in range(shards):
+            entries += cls._write_shard(directory, k, (cg.neighbors(i) for i in range(k, n, shards)))
+        cls._write_meta(directory, cg.nodes, shards, entries)
+        return cls(directory, cache_size)
+
+    @staticmethod
+    def _write_shard(directory, k, rows):
+        """
+        按分片内序号写出 .adj 邻居编号与 .idx 行偏移
+
+        Returns:
+            int: 写出的邻居条目数
+        """
+        idx_path, adj_path = _shard_paths(directory, k)
+        offsets = array("q", [0])
+        values = array("i")
+        for row in rows:
+            values.extend(row)
+            offsets.append(len(values))
+        with open(adj_path, "wb") as f:
+            values.tofile(f)
+        with open(idx_path, "wb") as f:
+            offsets.tofile(f)
+        return len(values)
+
+    @staticmethod
+    def _write_meta(directory, ids, shards, entries):
+        # 元数据最后写出，标志存储构建完成
+        with open(os.path.join(directory, NODES_FILE), "w", encoding="utf-8") as f:
+            for uid in ids:
+                f.write(f"{uid}\n")
+        with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"format": FORMAT_VERSION, "shards": shards, "nodes": len(ids),
+                       "edges": entries // 2}, f)
+
+    def close(self):
+        """
+        释放全部内存映射
+        """
+        for view in self._offsets + self._values:
+            view.release()
+        for mm in self._maps:
+            mm.close()
+        self._maps = []
+        self._offsets = []
+        self._values = []
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.registry)
+
+    def add_listener(self, fn):
+        """只读存储不会变化，监听器永远不会被回调"""
+
+    def remove_listener(self, fn):
+        pass
+
+    def _offsets_of(self, i):
+        if self._closed:
+            raise ValueError(f"分片存储已关闭: {self.directory}")
+        return self._offsets[i % self.shards]
+
+    def _read(self, i):
+        offsets = self._offsets_of(i)
+        local = i // self.shards
+        return self._values[i % self.shards][offsets[local]:offsets[local + 1]]
+
+    def neighbor_indices(self, i):
+        """
+        直接从分片读取编号 i 的邻居编号 (不经过缓存)
+        """
+        return self._read(i).tolist()
+
+    def get_neighbors(self, node_id):
+        """
+        获取邻居ID列表；命中缓存直接返回，否则从分片读取后放入缓存
+
+        Returns:
+            list: 邻居节点 ID 的列表，节点不存在时返回空列表
+        """
+        i = self.registry.index.get(node_id)
+        if i is None:
+            return []
+        with self._lock:
+            nbrs = self._cache.get(i)
+            if nbrs is not None:
+                self.hits += 1
+                self._cache.move_to_end(i)
+                return nbrs
+            self.misses += 1
+        ids = self.registry.ids
+        nbrs = [ids[j] for j in self._read(i)]
+        with self._lock:
+            if i not in self._cache and len(nbrs) <= self.cache_size:
+                self._cache[i] = nbrs
+                self._cached_entries += len(nbrs) + 1
+                while self._cached_entries > self.cache_size:
+                    _, old = self._cache.popitem(last=False)
+                    self._cached_entries -= len(old) + 1
+                    self.evictions += 1
+        return nbrs
+
+    def has_node(self, node_id):
+        return node_id in self.registry.index
+
+    def has_edge(self, u, v):
+        return v in self.get_neighbors(u)
+
+    def get_all_nodes(self):
+        return list(self.registry.ids)
+
+    def adjacency_items(self):
+        """
+        按编号顺序逐个产出 (节点ID, 邻居ID列表)，不占用缓存
+        """
+        ids = self.registry.ids
+        for i, uid in enumerate(ids):
+            yield uid, [ids[j] for j in self._read(i)]
+
+    def compact(self):
+        """
+        Returns:
+            ShardedCSRView: 直接读取分片文件的 CSR 视图 (不复制邻接数据)
+        """
+        if self._compact is None:
+            self._compact = ShardedCSRView(self)
+        return self._compact
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._cached_entries = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: 缓存命中率等统计信息
+        """
+        total = self.hits + self.misses
+        return {
+            "nodes": len(self.registry),
+            "edges": self.edges,
+            "shards": self.shards,
+            "cached_nodes": len(self._cache),
+            "cached_entries": self._cached_entries,
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,226 @@
+﻿"""
+兴趣标签倒排索引模块
+
+标签 → 按统一ID口径 (uid_sort_key) 升序排列的用户ID倒排表：
+1. "同时喜欢 编程 与 篮球" 的 AND 查询从最短的倒排表出发，依次与更长的倒排表做
+   跳跃 (galloping) 求交：在长表中按 1, 2, 4, ... 的步长前跳再二分定位，
+   代价为 O(s · log(L / s))，短表远小于长表时几乎与长表长度无关
+2. OR 查询对各倒排表做多路归并，结果同样有序且不重复
+3. 倒排表长度即标签热度，无需扫描全部用户的兴趣串
+订阅哈希表的变更事件，用户的新增、修改与删除只调整其兴趣标签对应的倒排表。
+"""
+
+import sys
+import os
+import heapq
+from bisect import bisect_left
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_structure.id_registry import uid_sort_key
+
+
+def _posting_key(uid):
+    """倒排表排序键：先按统一ID口径，再按原始ID区分 '007' 与 '7' 这类数值相同的ID"""
+    return uid_sort_key(uid) + (uid,)
+
+
+def parse_tag_query(text):
+    """
+    将 '编程 篮球'、'编程;篮球' 或 '编程,篮球' 形式的查询串拆分为去重后的标签列表
+    """
+    tags = []
+    for tag in text.replace(";", " ").replace(",", " ").replace("，", " ").split():
+        if tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def _gallop(keys, target, lo):
+    """
+    跳跃查找：返回 keys[lo:] 中第一个不小于 target 的下标
+    """
+    n = len(keys)
+    bound = 1
+    while lo + bound < n and keys[lo + bound] < target:
+        bound *= 2
+    return bisect_left(keys, target, lo + bound // 2, min(lo + bound + 1, n))
+
+
+def _intersect(small, large):
+    """
+    两个有序倒排表 (排序键列表, 用户ID列表) 的跳跃求交
+    """
+    s_keys, s_ids = small
+    l_keys = large[0]
+    n = len(l_keys)
+    keys, ids = [], []
+    pos = 0
+    for key, uid in zip(s_keys, s_ids):
+        pos = _gallop(l_keys, key, pos)
+        if pos == n:
+            break
+        if l_keys[pos] == key:
+            keys.append(key)
+            ids.append(uid)
+            pos += 1
+    return keys, ids
+
+
+class TagIndex:
+    """
+    兴趣标签倒排索引
+
+    每个标签的倒排表由两个等长列表组成：排序键 (供二分与跳跃比较) 与对应的用户ID，
+    排序键与用户ID一一对应。
+    """
+    def __init__(self):
+        self._postings = {}   # 标签 → (排序键列表, 用户ID列表)
+        self._tags = {}       # 用户ID → 标签元组，删除或修改时据此找到旧倒排表
+
+    def __len__(self):
+        return len(self._postings)
+
+    def __contains__(self, tag):
+        return tag in self._postings
+
+    def insert(self, user_id, interests):
+        """
+        写入 (或覆盖) 一名用户的兴趣标签
+        """
+        if user_id in self._tags:
+            self.remove(user_id)
+        tags = tuple(dict.fromkeys(t for t in interests.split(";") if t)) if interests else ()
+        if not tags:
+            return
+        self._tags[user_id] = tags
+        key = _posting_key(user_id)
+        for tag in tags:
+            posting = self._postings.get(tag)
+            if posting is None:
+                self._postings[tag] = ([key], [user_id])
+                continue
+            i = bisect_left(posting[0], key)
+            posting[0].insert(i, key)
+            posting[1].insert(i, user_id)
+
+    def remove(self, user_id):
+        tags = self._tags.pop(user_id, None)
+        if tags is None:
+            return False
+        key = _posting_key(user_id)
+        for tag in tags:
+            keys, ids = self._postings[tag]
+            i = bisect_left(keys, key)
+            del keys[i]
+            del ids[i]
+            if not keys:
+                del self._postings[tag]
+        return True
+
+    def users_with(self, tag):
+        """
+        Returns:
+            list: 拥有该标签的用户ID (按统一ID口径升序)
+        """
+        posting = self._postings.get(tag)
+        return list(posting[1]) if posting else []
+
+    def count(self, tag):
+        posting = self._postings.get(tag)
+        return len(posting[0]) if posting else 0
+
+    def query_all(self, tags):
+        """
+        AND 查询：同时拥有全部标签的用户，按倒排表由短到长依次跳跃求交
+
+        Returns:
+            list: 用户ID (按统一ID口径升序)
+        """
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return []
+        postings = []
+        for tag in tags:
+            posting = self._postings.get(tag)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=lambda p: len(p[0]))
+        result = postings[0]
+        for posting in postings[1:]:
+            result = _intersect(result, posting)
+            if not result[0]:
+                break
+        return list(result[1])
+
+    def query_any(self, tags):
+        """
+        OR 查询：至少拥有其中一个标签的用户，多路归并各倒排表
+
+        Returns:
+            list: 用户ID (按统一ID口径升序，不重复)
+        """
+        postings = [self._postings[tag] for tag in dict.fromkeys(tags) if tag in self._postings]
+        if len(postings) == 1:
+            return list(postings[0][1])
+        res = []
+        last = None
+        for key, uid in heapq.merge(*(zip(keys, ids) for keys, ids in postings), key=lambda item: item[0]):
+            if key != last:
+                res.append(uid)
+                last = key
+        return res
+
+    def popularity(self, k=None):
+        """
+        标签热度排行
+
+        Args:
+            k (int): 最多返回条数，None 表示全部
+
+        Returns:
+            list[tuple[str, int]]: 按人数降序 (同人数按标签名) 的 (标签, 人数)
+        """
+        counts = [(tag, len(keys)) for tag, (keys, _) in self._postings.items()]
+        if k is not None:
+            return heapq.nsmallest(k, counts, key=lambda item: (-item[1], item[0]))
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts
+
+    def build(self, hash_table):
+        """
+        从哈希表全量构建索引：全部用户只排序一次，再按序追加到各倒排表，倒排表无需各自排序
+        """
+        self._postings.clear()
+        self._tags.clear()
+        postings = self._postings
+        for key, uid in sorted((_posting_key(uid), uid) for uid in hash_table.get_all_keys()):
+            info = hash_table.get(uid)
+            if not info or not info["interests"]:
+                continue
+            tags = tuple(dict.fromkeys(t for t in info["interests"].split(";") if t))
+            if not tags:
+                continue
+            self._tags[uid] = tags
+            for tag in tags:
+                posting = postings.get(tag)
+                if posting is None:
+                    postings[tag] = ([key], [uid])
+                else:
+                    posting[0].append(key)
+                    posting[1].append(uid)
+        return self
+
+    def attach(self, hash_table):
+        """
+        全量构建并订阅哈希表变更，此后档案的新增、修改与删除都会增量同步到索引
+        """
+        self.build(hash_table)
+        hash_table.add_listener(self.on_change)
+        return self
+
+    def on_change(self, event, key, old_value, new_value):
+        if event == "remove":
+            self.remove(key)
+        elif old_value is None or old_value["interests"] != new_value["interests"]:
+            self.insert(key, new_value["interests"])
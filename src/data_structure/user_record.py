@@ -0,0 +1,73 @@
+﻿"""
+用户档案记录模块
+
+以 __slots__ 定长记录取代每名用户一个 {"name": ..., "interests": ...} 字典：
+记录对象不带实例 __dict__，姓名与兴趣串经字符串池驻留后在用户之间共享
+(热门兴趣组合与常见姓名大量重复)。
+记录保留 record["name"] / record.get("interests") 形式的只读访问，原有调用方无需修改。
+"""
+
+import sys
+
+
+class UserRecord:
+    """
+    用户档案定长记录
+
+    Attributes:
+        name (str): 姓名
+        interests (str): 以分号分隔的兴趣标签串
+    """
+    __slots__ = ("name", "interests")
+
+    FIELDS = ("name", "interests")
+
+    def __init__(self, name, interests=""):
+        # 字符串池: 相同内容的姓名 / 兴趣串只保留一份
+        self.name = sys.intern(name)
+        self.interests = sys.intern(interests)
+
+    @classmethod
+    def from_value(cls, value):
+        """
+        将 dict 形式的档案转换为记录；已是 UserRecord 时原样返回
+        """
+        if isinstance(value, cls):
+            return value
+        return cls(value["name"], value.get("interests", ""))
+
+    def __getitem__(self, key):
+        if key == "name":
+            return self.name
+        if key == "interests":
+            return self.interests
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def get(self, key, default=None):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        return default
+
+    def keys(self):
+        return self.FIELDS
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.FIELDS]
+
+    def to_dict(self):
+        return {"name": self.name, "interests": self.interests}
+
+    def __eq__(self, other):
+        if isinstance(other, UserRecord):
+            return self.name == other.name and self.interests == other.interests
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"UserRecord(name={self.name!r}, interests={self.interests!r})"
@@ -1,23 +1,90 @@
-﻿import tkinter as tk
+﻿import time
+_T_START = time.perf_counter()  # 启动计时起点，用于生成启动阶段耗时报告
+
+import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data_structure.hash_table import HashTable
 from data_structure.adjacency_list import Graph
+from data_structure.minhash_lsh import MinHashLSH
+from data_structure.tag_index import TagIndex, parse_tag_query
+from data_structure.id_registry import uid_sort_key
+from data_structure.user_record import UserRecord
 from utils.data_reader import load_all_data, save_all_data
+from utils.profiler import PROFILER, instrument, timed_block
+from utils.concurrency import RWLock, synchronized
+from utils.sqlite_store import SQLiteStore, is_database_path
+from utils.delta_ingest import DeltaWatcher, apply_delta, read_delta
 import algorithm.algorithms as algo
+import algorithm.analytics as analytics
+import algorithm.community as community
+from algorithm.rec_cache import RecommendationCache
+from algorithm.intimacy import IntimacyWeights, strongest_path
+
+# networkx / matplotlib 仅服务于【网络图谱】选项卡，导入代价高昂，
+# 故延迟到该选项卡首次显示时才加载，主窗口与查询功能无需为其买单
+nx = None
+plt = None
+FigureCanvasTkAgg = None
+
+
+def _load_graph_stack():
+    """
+    按需导入可视化依赖 (只在首次打开网络图谱选项卡时执行一次)
+    """
+    global nx, plt, FigureCanvasTkAgg
+    if nx is not None:
+        return
+    # 引入 networkx 仅用于网络图谱可视化中计算节点在画布上的坐标排版和渲染，不涉及图遍历逻辑
+    import networkx
+    import matplotlib
+    import matplotlib.pyplot as pyplot
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as canvas_cls
+
+    # 强行支持中文字体，防止图形节点乱码
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    nx, plt, FigureCanvasTkAgg = networkx, pyplot, canvas_cls
+
 
-# 引入 networkx 仅用于网络图谱可视化中计算节点在画布上的坐标排版和渲染，不涉及图遍历逻辑
-import networkx as nx
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
+# 用户数超过该阈值时，图谱改为按社区聚合绘制 (每个社区一个超节点)，避免布局算法卡死界面
+GRAPH_AGGREGATE_THRESHOLD = 300
+# 二度人脉每页显示条数，超级节点的二度人脉可达数十万，只按页取出
+SECOND_DEGREE_PAGE_SIZE = 20
+# 兴趣标签检索结果最多显示的用户数
+TAG_SEARCH_LIMIT = 100
+# 监听追加写入的增量变更文件时的轮询间隔 (毫秒)
+DELTA_POLL_MS = 2000
+# 用户数超过该值时，桥梁用户 (介数中心性) 只抽样这么多个源点近似计算
+BETWEENNESS_SAMPLE = 500
+# 社区着色调色板 (柔和色系，与按钮渐变风格保持一致)
+COMMUNITY_COLORS = ['#7EB6FF', '#B5EAD7', '#FFDAC1', '#C7CEEA', '#FFB7B2',
+                    '#E2F0CB', '#9BF6FF', '#FF9AA2', '#A0C4FF', '#F6D186']
 
-# 强行支持中文字体，防止图形节点乱码
-rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
-rcParams['axes.unicode_minus'] = False
+
+class StartupTimer:
+    """
+    启动阶段计时器：记录每个阶段相对进程启动的累计耗时
+    """
+    def __init__(self, t_start):
+        self.t_start = t_start
+        self.t_last = t_start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.t_last, now - self.t_start))
+        self.t_last = now
+
+    def report(self):
+        lines = ["阶段                      本阶段(ms)   累计(ms)"]
+        for phase, cost, total in self.phases:
+            lines.append(f"{phase:<20}{cost * 1000:>12.1f}{total * 1000:>11.1f}")
+        return "\n".join(lines)
 
 
 class FlowFrame(tk.Frame):
@@ -180,9 +247,24 @@ class App:
         self.r.title("社交网络分析系统")
         self.r.geometry("900x650")
         self.r.configure(bg='#F0F6FB')
+        self.startup = StartupTimer(_T_START)
+        self.startup.mark("模块导入与窗口创建")
         
         self.graph = Graph()
         self.hash_table = HashTable()
+        # 读写锁: 查询 / 统计 / 回写共享读，增删改及数据替换独占写，多步修改整体原子可见
+        self.data_lock = RWLock()
+        # 后台工作线程: 全网统计与回写磁盘在数据快照上运行，不阻塞界面与编辑
+        self._bg_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bg")
+        # PageRank 计算器保留上次结果供编辑后热启动；中心性模块依赖 NumPy，首次查看影响力排行时才创建
+        self.pagerank = None
+        self.interest_index = MinHashLSH()
+        self.tag_index = TagIndex()
+        self.rec_cache = RecommendationCache(self.graph, self.hash_table)
+        self.intimacy = IntimacyWeights(self.graph, self.hash_table)
+        self._second_pager = None  # 二度人脉分页状态: 查询用户、共同好友计数与游标
+        self.store = None  # 以 SQLite 数据库加载时的存储后端，回写只提交增量变更
+        self._delta_watcher = None  # 正在监听的增量变更文件
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.user_data_path = os.path.join(self.base_dir, "data", "user_sample.csv")
         self.friend_data_path = os.path.join(self.base_dir, "data", "friend_sample.txt")
@@ -198,6 +280,7 @@ class App:
             messagebox.showwarning("警告", f"初始数据加载失败:\n{e}")
             init_msg = "数据加载失败，请检查文件路径。\n"
             status_text = "加载失败"
+        self.startup.mark("数据加载")
 
         # ---------- 顶部操作面板 ----------
         top_frame = tk.Frame(self.r, bg='#F0F6FB')
@@ -210,8 +293,16 @@ class App:
         menu_settings.add_command(label="字体放大", command=lambda: self.adjust_font_size(1))
         menu_settings.add_command(label="字体缩小", command=lambda: self.adjust_font_size(-1))
         menu_bar.add_cascade(label="设置(S)", menu=menu_settings)
+
+        menu_data = tk.Menu(menu_bar, tearoff=0)
+        menu_data.add_command(label="增量导入变更文件...", command=self.import_delta_dialog)
+        menu_data.add_command(label="监听增量变更文件...", command=self.start_delta_watch)
+        menu_data.add_command(label="停止监听", command=self.stop_delta_watch)
+        menu_bar.add_cascade(label="数据(D)", menu=menu_data)
         
         menu_help = tk.Menu(menu_bar, tearoff=0)
+        menu_help.add_command(label="启动耗时报告", command=self.show_startup_report)
+        menu_help.add_command(label="性能统计", command=self.show_profiler_view)
         menu_help.add_command(label="关于本系统", command=self.show_about)
         menu_bar.add_cascade(label="帮助(H)", menu=menu_help)
         
@@ -324,6 +415,7 @@ class App:
         ttk.Button(btn_frame_main, text="加载数据", command=self.load_data_dialog, style="Btn1.TButton")
         ttk.Button(btn_frame_main, text="查询直接好友", command=self.do_1st, style="Btn2.TButton")
         ttk.Button(btn_frame_main, text="查找二度人脉", command=self.do_2nd, style="Btn3.TButton")
+        ttk.Button(btn_frame_main, text="更多二度人脉", command=self.do_2nd_more, style="Btn3.TButton")
         ttk.Button(btn_frame_main, text="计算社交距离", command=self.do_dist, style="Btn4.TButton")
         
         self.target_var = tk.StringVar()
@@ -331,6 +423,9 @@ class App:
         self.combo_target.bind("<KeyRelease>", on_combo_keyrelease)
         
         ttk.Button(btn_frame_main, text="智能推荐", command=self.do_rec, style="Btn5.TButton")
+        ttk.Button(btn_frame_main, text="影响力排行", command=self.do_influence, style="Btn5.TButton")
+        ttk.Button(btn_frame_main, text="桥梁用户", command=self.do_brokers, style="Btn5.TButton")
+        ttk.Button(btn_frame_main, text="兴趣相投", command=self.do_similar, style="Btn5.TButton")
         ttk.Button(btn_frame_main, text="清空结果", command=self.clear_output, style="Btn6.TButton")
         ttk.Button(btn_frame_main, text="添加用户", command=self.show_add_user_dialog, style="Btn7.TButton")
         ttk.Button(btn_frame_main, text="修改信息", command=self.show_edit_user_dialog, style="Btn8.TButton")
@@ -369,7 +464,35 @@ class App:
         overview_elf.pack(fill=tk.X, pady=(0, 20))
         self.lbl_overview_users = tk.Label(overview_elf, text=f"用户总数: {len(self.hash_table.get_all_keys())}", font=("Microsoft YaHei", 10))
         self.lbl_overview_users.pack(anchor=tk.W, pady=2)
-        tk.Label(overview_elf, text="关系总数: (自动聚合)", font=("Microsoft YaHei", 10)).pack(anchor=tk.W, pady=2)
+        self.lbl_overview_edges = tk.Label(overview_elf, text="关系总数: (自动聚合)", font=("Microsoft YaHei", 10))
+        self.lbl_overview_edges.pack(anchor=tk.W, pady=2)
+        
+        # 网络结构分析框 (三角形 / 聚类系数 / 度分布)
+        analytics_lf = tk.LabelFrame(stats_padding, text="网络结构分析", font=("Microsoft YaHei", 10, "bold"), padx=10, pady=10)
+        analytics_lf.pack(fill=tk.X, pady=(0, 20))
+        self.lbl_an_tri = tk.Label(analytics_lf, text="三角形总数: 暂无", font=("Microsoft YaHei", 10))
+        self.lbl_an_tri.pack(anchor=tk.W, pady=2)
+        self.lbl_an_cc = tk.Label(analytics_lf, text="聚类系数: 暂无", font=("Microsoft YaHei", 10))
+        self.lbl_an_cc.pack(anchor=tk.W, pady=2)
+        self.lbl_an_deg = tk.Label(analytics_lf, text="度分布: 暂无", font=("Microsoft YaHei", 10), justify=tk.LEFT, wraplength=780)
+        self.lbl_an_deg.pack(anchor=tk.W, pady=2)
+        self._analytics_dirty = True
+
+        # 兴趣标签框 (热度排行 + 多标签检索，均由倒排索引直接给出)
+        tags_lf = tk.LabelFrame(stats_padding, text="兴趣标签", font=("Microsoft YaHei", 10, "bold"), padx=10, pady=10)
+        tags_lf.pack(fill=tk.X, pady=(0, 20))
+        self.lbl_tag_pop = tk.Label(tags_lf, text="热门标签: 暂无", font=("Microsoft YaHei", 10), justify=tk.LEFT, wraplength=780)
+        self.lbl_tag_pop.pack(anchor=tk.W, pady=2)
+        tag_search_f = tk.Frame(tags_lf)
+        tag_search_f.pack(anchor=tk.W, pady=(6, 2))
+        tk.Label(tag_search_f, text="标签检索:", font=("Microsoft YaHei", 10)).pack(side=tk.LEFT)
+        self.entry_tags = tk.Entry(tag_search_f, width=30)
+        self.entry_tags.pack(side=tk.LEFT, padx=5)
+        self.entry_tags.bind("<Return>", lambda e: self.do_tag_search())
+        self.tag_mode_var = tk.StringVar(value="all")
+        tk.Radiobutton(tag_search_f, text="同时具备", variable=self.tag_mode_var, value="all").pack(side=tk.LEFT)
+        tk.Radiobutton(tag_search_f, text="具备任一", variable=self.tag_mode_var, value="any").pack(side=tk.LEFT)
+        ttk.Button(tag_search_f, text="检索", command=self.do_tag_search, style="Btn4.TButton").pack(side=tk.LEFT, padx=5)
         
         # 当前用户信息框
         self.user_stats_lf = tk.LabelFrame(stats_padding, text="当前用户信息", font=("Microsoft YaHei", 10, "bold"), padx=10, pady=10)
@@ -382,6 +505,8 @@ class App:
         self.lbl_s_int.pack(anchor=tk.W, pady=2)
         self.lbl_s_fri = tk.Label(self.user_stats_lf, text="直接好友数: 暂无", font=("Microsoft YaHei", 10))
         self.lbl_s_fri.pack(anchor=tk.W, pady=2)
+        self.lbl_s_cc = tk.Label(self.user_stats_lf, text="聚类系数: 暂无", font=("Microsoft YaHei", 10))
+        self.lbl_s_cc.pack(anchor=tk.W, pady=2)
 
         # Tab 3: 网络图谱
         self.tab_graph = ttk.Frame(self.notebook)
@@ -391,14 +516,17 @@ class App:
         graph_toolbar = tk.Frame(self.tab_graph, bg='#F0F6FB')
         graph_toolbar.pack(fill=tk.X, padx=5, pady=2)
         ttk.Button(graph_toolbar, text="重置视图", command=self._reset_graph_view, style="Btn6.TButton").pack(side=tk.LEFT, padx=2)
+        self.graph_community_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(graph_toolbar, text="按社区着色", variable=self.graph_community_var,
+                       command=self.draw_graph, bg='#F0F6FB').pack(side=tk.LEFT, padx=8)
+        self.communities = None
         tk.Label(graph_toolbar, text="提示: 滚轮缩放 | 右键拖拽平移", bg='#F0F6FB', fg='#888', font=("Microsoft YaHei", 8)).pack(side=tk.RIGHT)
         
-        # 内置 Matplotlib 图像画布容器
-        self.fig, self.ax = plt.subplots(figsize=(10, 6))
-        self.fig.patch.set_facecolor('#F0F8FF')
-        self.fig.subplots_adjust(left=0.01, right=0.99, top=0.99, bottom=0.01)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.tab_graph)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # Matplotlib 画布延迟到选项卡首次显示时再构建，见 _ensure_graph_canvas
+        self.fig = None
+        self.ax = None
+        self.canvas = None
+        self._graph_dirty = True
         
         # --- 图谱交互：滚轮缩放 + 右键拖拽平移 ---
         self._graph_drag_data = {}
@@ -409,55 +537,7 @@ class App:
         self._graph_base_font_size = 9
         self._graph_edge_collection = None
         self._graph_base_line_width = 1.5
-        
-        def on_graph_scroll(event):
-            if event.inaxes != self.ax:
-                return
-            xlim = self.ax.get_xlim()
-            ylim = self.ax.get_ylim()
-            xc = (xlim[0] + xlim[1]) / 2
-            yc = (ylim[0] + ylim[1]) / 2
-            scale = 0.8 if event.button == 'up' else 1.25
-            self._graph_zoom_level /= scale
-            xw = (xlim[1] - xlim[0]) * scale / 2
-            yw = (ylim[1] - ylim[0]) * scale / 2
-            self.ax.set_xlim(xc - xw, xc + xw)
-            self.ax.set_ylim(yc - yw, yc + yw)
-            # 同步缩放节点圆圈大小和标签字号
-            new_size = self._graph_base_node_size * (self._graph_zoom_level ** 2)
-            for coll in self._graph_node_collections:
-                coll.set_sizes([new_size] * len(coll.get_offsets()))
-            new_font = self._graph_base_font_size * self._graph_zoom_level
-            for txt in self._graph_label_texts.values():
-                txt.set_fontsize(new_font)
-            if self._graph_edge_collection:
-                self._graph_edge_collection.set_linewidths(
-                    [self._graph_base_line_width * self._graph_zoom_level])
-            self.canvas.draw_idle()
-        
-        def on_graph_press(event):
-            if event.inaxes != self.ax or event.button != 3:
-                return
-            self._graph_drag_data = {'x': event.xdata, 'y': event.ydata}
-        
-        def on_graph_motion(event):
-            if not self._graph_drag_data or event.inaxes != self.ax or event.button != 3:
-                return
-            dx = self._graph_drag_data['x'] - event.xdata
-            dy = self._graph_drag_data['y'] - event.ydata
-            xlim = self.ax.get_xlim()
-            ylim = self.ax.get_ylim()
-            self.ax.set_xlim(xlim[0] + dx, xlim[1] + dx)
-            self.ax.set_ylim(ylim[0] + dy, ylim[1] + dy)
-            self.canvas.draw_idle()
-        
-        def on_graph_release(event):
-            self._graph_drag_data = {}
-        
-        self.fig.canvas.mpl_connect('scroll_event', on_graph_scroll)
-        self.fig.canvas.mpl_connect('button_press_event', on_graph_press)
-        self.fig.canvas.mpl_connect('motion_notify_event', on_graph_motion)
-        self.fig.canvas.mpl_connect('button_release_event', on_graph_release)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         # ---------- 底部状态栏 ----------
         self.status_var = tk.StringVar()
@@ -472,7 +552,7 @@ class App:
         )
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
-        # 初始化统计板及全量图谱绘制
+        # 初始化统计板 (全量图谱在首次切换到图谱选项卡时才绘制)
         sorted_ids = self._get_sorted_user_ids()
         if sorted_ids:
             first_uid = sorted_ids[0]
@@ -481,7 +561,9 @@ class App:
             self.update_stats_panel(first_uid)
         else:
             self.update_stats_panel("")
-        self.r.after(100, self.draw_graph) # 延迟绘制防止阻塞GUI初始化
+        self.startup.mark("界面构建")
+        # 事件循环首次空闲即代表窗口已可交互 (图谱不再参与启动阶段)
+        self.r.after_idle(lambda: self.startup.mark("首次可交互"))
 
     def refresh_user_combos(self):
         self.global_user_list = []
@@ -496,30 +578,57 @@ class App:
             pass
 
     def _get_sorted_user_ids(self):
-        def _uid_sort(uid):
-            uid_str = str(uid)
-            if uid_str.isdigit():
-                return (0, int(uid_str))
-            return (1, uid_str)
-
-        return sorted(self.hash_table.get_all_keys(), key=_uid_sort)
+        return sorted(self.hash_table.get_all_keys(), key=uid_sort_key)
 
     def load_data_from_paths(self, user_path, friend_path, refresh_ui=True):
         """
         从指定路径加载数据。为避免半加载状态，采用临时结构成功后再替换。
+        user_path 为 SQLite 数据库 (.db / .sqlite) 时从库中加载，此时 friend_path 不使用。
         """
         new_graph = Graph()
         new_hash_table = HashTable()
-        load_all_data(user_path, friend_path, new_hash_table, new_graph)
+        new_store = None
+        if is_database_path(user_path):
+            new_store = SQLiteStore(user_path)
+            try:
+                new_store.load(new_hash_table, new_graph)
+            except ValueError:
+                new_store.close()
+                raise
+            # 加载完成后才订阅变更，此后的增删改记入待写日志，回写时只提交变化的行
+            new_store.attach(new_hash_table, new_graph)
+        else:
+            load_all_data(user_path, friend_path, new_hash_table, new_graph)
+        # 兴趣相似度 LSH 索引随数据一起构建，此后由哈希表变更回调增量维护
+        with timed_block("rebuild_interest_index"):
+            new_interest_index = MinHashLSH(bands=32).attach(new_hash_table)
+        # 兴趣标签倒排索引同样随档案变更增量维护
+        with timed_block("rebuild_tag_index"):
+            new_tag_index = TagIndex().attach(new_hash_table)
+        # 推荐结果缓存订阅图谱与档案变更，只失效受影响用户的条目
+        new_rec_cache = RecommendationCache(new_graph, new_hash_table).attach()
+        # 好友亲密度按边缓存，同样只失效受变更影响的边
+        new_intimacy = IntimacyWeights(new_graph, new_hash_table).attach()
 
-        self.graph = new_graph
-        self.hash_table = new_hash_table
+        with self.data_lock.write_locked():
+            self.graph = new_graph
+            self.hash_table = new_hash_table
+            self.interest_index = new_interest_index
+            self.tag_index = new_tag_index
+            self.rec_cache = new_rec_cache
+            self.intimacy = new_intimacy
+            old_store, self.store = self.store, new_store
+        if old_store is not None:
+            # 排在后台回写队列之后关闭，正在提交的增量变更不会被打断
+            self._bg_pool.submit(old_store.close)
+        self._second_pager = None
+        new_graph.add_listener(self._reset_second_pager)
         self.user_data_path = user_path
         self.friend_data_path = friend_path
 
         if refresh_ui:
             self.refresh_user_combos()
-            self.lbl_overview_users.config(text=f"用户总数: {len(self.hash_table.get_all_keys())}")
+            self.update_overview_panel()
             sorted_ids = self._get_sorted_user_ids()
             if sorted_ids:
                 uid = sorted_ids[0]
@@ -540,14 +649,16 @@ class App:
     def load_data_dialog(self):
         init_dir = os.path.join(self.base_dir, "data")
         user_path = filedialog.askopenfilename(
-            title="选择用户信息文件",
+            title="选择用户信息文件或数据库",
             initialdir=init_dir,
-            filetypes=[("CSV/TXT 文件", "*.csv *.txt"), ("所有文件", "*.*")]
+            filetypes=[("CSV/TXT 文件", "*.csv *.txt"), ("SQLite 数据库", "*.db *.sqlite *.sqlite3"),
+                       ("所有文件", "*.*")]
         )
         if not user_path:
             return
 
-        friend_path = filedialog.askopenfilename(
+        # 数据库同时包含档案与关系，无需再选择关系文件
+        friend_path = user_path if is_database_path(user_path) else filedialog.askopenfilename(
             title="选择好友关系文件",
             initialdir=init_dir,
             filetypes=[("TXT/CSV 文件", "*.txt *.csv"), ("所有文件", "*.*")]
@@ -563,24 +674,123 @@ class App:
         except Exception as e:
             messagebox.showerror("加载失败", str(e))
 
+    def _graph_tab_visible(self):
+        return self.notebook.select() == str(self.tab_graph)
+
+    def _on_tab_changed(self, event=None):
+        """切换到网络图谱选项卡时才构建画布，并补画期间积压的数据变更"""
+        if self._graph_tab_visible() and self._graph_dirty:
+            self.draw_graph()
+        if self.notebook.select() == str(self.tab_stats) and self._analytics_dirty:
+            self.refresh_network_analytics()
+
+    def _ensure_graph_canvas(self):
+        """首次显示图谱时导入可视化依赖并构建 Matplotlib 画布"""
+        if self.canvas is not None:
+            return
+        _load_graph_stack()
+        self.startup.mark("图谱依赖导入")
+
+        # 内置 Matplotlib 图像画布容器
+        self.fig, self.ax = plt.subplots(figsize=(10, 6))
+        self.fig.patch.set_facecolor('#F0F8FF')
+        self.fig.subplots_adjust(left=0.01, right=0.99, top=0.99, bottom=0.01)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.tab_graph)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        self.fig.canvas.mpl_connect('scroll_event', self._on_graph_scroll)
+        self.fig.canvas.mpl_connect('button_press_event', self._on_graph_press)
+        self.fig.canvas.mpl_connect('motion_notify_event', self._on_graph_motion)
+        self.fig.canvas.mpl_connect('button_release_event', self._on_graph_release)
+
+    def _on_graph_scroll(self, event):
+        if event.inaxes != self.ax:
+            return
+        xlim = self.ax.get_xlim()
+        ylim = self.ax.get_ylim()
+        xc = (xlim[0] + xlim[1]) / 2
+        yc = (ylim[0] + ylim[1]) / 2
+        scale = 0.8 if event.button == 'up' else 1.25
+        self._graph_zoom_level /= scale
+        xw = (xlim[1] - xlim[0]) * scale / 2
+        yw = (ylim[1] - ylim[0]) * scale / 2
+        self.ax.set_xlim(xc - xw, xc + xw)
+        self.ax.set_ylim(yc - yw, yc + yw)
+        # 同步缩放节点圆圈大小和标签字号
+        new_size = self._graph_base_node_size * (self._graph_zoom_level ** 2)
+        for coll in self._graph_node_collections:
+            coll.set_sizes([new_size] * len(coll.get_offsets()))
+        new_font = self._graph_base_font_size * self._graph_zoom_level
+        for txt in self._graph_label_texts.values():
+            txt.set_fontsize(new_font)
+        if self._graph_edge_collection:
+            self._graph_edge_collection.set_linewidths(
+                [self._graph_base_line_width * self._graph_zoom_level])
+        self.canvas.draw_idle()
+
+    def _on_graph_press(self, event):
+        if event.inaxes != self.ax or event.button != 3:
+            return
+        self._graph_drag_data = {'x': event.xdata, 'y': event.ydata}
+
+    def _on_graph_motion(self, event):
+        if not self._graph_drag_data or event.inaxes != self.ax or event.button != 3:
+            return
+        dx = self._graph_drag_data['x'] - event.xdata
+        dy = self._graph_drag_data['y'] - event.ydata
+        xlim = self.ax.get_xlim()
+        ylim = self.ax.get_ylim()
+        self.ax.set_xlim(xlim[0] + dx, xlim[1] + dx)
+        self.ax.set_ylim(ylim[0] + dy, ylim[1] + dy)
+        self.canvas.draw_idle()
+
+    def _on_graph_release(self, event):
+        self._graph_drag_data = {}
+
+    @instrument("draw_graph")
+    @synchronized("read")
     def draw_graph(self):
-        """利用 NetworkX 计算节点坐标并渲染自定义图结构"""
+        """
+        利用 NetworkX 计算节点坐标并渲染自定义图结构
+
+        图谱选项卡不可见时仅标记为待重绘，等到用户切换过去再真正渲染。
+        """
+        if not self._graph_tab_visible():
+            self._graph_dirty = True
+            return
+        first_render = self.canvas is None
+        self._ensure_graph_canvas()
+        self._graph_dirty = False
         self.ax.clear()
         
-        G = nx.Graph()
-        
         valid_users = set(self.hash_table.get_all_keys())
+        color_by_community = self.graph_community_var.get()
+        if color_by_community or len(valid_users) > GRAPH_AGGREGATE_THRESHOLD:
+            self.communities = community.label_propagation(self.graph)
+        if len(valid_users) > GRAPH_AGGREGATE_THRESHOLD:
+            self._draw_community_graph()
+        else:
+            self._draw_user_graph(valid_users, color_by_community)
+        
+        self.ax.set_axis_off()
+        self.canvas.draw()
+        if first_render:
+            self.startup.mark("图谱首次渲染")
+
+    def _draw_user_graph(self, valid_users, color_by_community):
+        """逐用户绘制：主网居中舒展 + 孤岛外环固定"""
+        G = nx.Graph()
         
         # 添加节点: 严密排序插入以保证图底层的顺序一致性
-        for uid in sorted(valid_users, key=lambda x: (0, int(str(x))) if str(x).isdigit() else (1, str(x))):
+        for uid in sorted(valid_users, key=uid_sort_key):
             u_info = self.hash_table.get(uid)
             G.add_node(uid, label=u_info['name'])
             
         # 添加边: 按排序遍历
-        for u in sorted(self.graph.get_all_nodes(), key=lambda x: (0, int(str(x))) if str(x).isdigit() else (1, str(x))):
+        for u in sorted(self.graph.get_all_nodes(), key=uid_sort_key):
             if u not in valid_users:
                 continue
-            for v in sorted(self.graph.get_neighbors(u), key=lambda x: (0, int(str(x))) if str(x).isdigit() else (1, str(x))):
+            for v in sorted(self.graph.get_neighbors(u), key=uid_sort_key):
                 if v in valid_users and not G.has_edge(u, v):
                     G.add_edge(u, v)
 
@@ -627,10 +837,14 @@ class App:
         self._graph_base_node_size = node_size
         self._graph_zoom_level = 1.0
         
-        # 主网络节点：蓝色系
+        # 主网络节点：蓝色系；开启社区着色时按所属社区取色
         if main_list:
+            main_color = '#7EB6FF'
+            if color_by_community and self.communities:
+                main_color = [COMMUNITY_COLORS[self.communities.community_of(n) % len(COMMUNITY_COLORS)]
+                              for n in main_list]
             c1 = nx.draw_networkx_nodes(G, pos, nodelist=main_list, ax=self.ax,
-                                        node_color='#7EB6FF', edgecolors='#4A90E2',
+                                        node_color=main_color, edgecolors='#4A90E2',
                                         node_size=node_size, alpha=0.9)
             if c1:
                 self._graph_node_collections.append(c1)
@@ -652,9 +866,39 @@ class App:
             G, pos, labels, ax=self.ax,
             font_size=label_font_size, font_family='Microsoft YaHei')
         self._graph_base_font_size = label_font_size
-        
-        self.ax.set_axis_off()
-        self.canvas.draw()
+
+    def _draw_community_graph(self):
+        """大规模网络按社区聚合绘制：节点面积正比于社区人数，连线粗细反映社区间好友关系数"""
+        import math
+        comms = self.communities
+        top = min(comms.count, 40)
+        G = nx.Graph()
+        for c in range(top):
+            G.add_node(c)
+        for (a, b), cnt in community.community_edges(self.graph, comms).items():
+            if a < top and b < top:
+                G.add_edge(a, b, weight=cnt)
+
+        pos = nx.spring_layout(G, seed=42, weight='weight', iterations=80)
+        biggest = max(comms.sizes[:top]) if top else 1
+        sizes = [200 + 2400 * math.sqrt(comms.sizes[c] / biggest) for c in G.nodes()]
+        colors = [COMMUNITY_COLORS[c % len(COMMUNITY_COLORS)] for c in G.nodes()]
+        coll = nx.draw_networkx_nodes(G, pos, ax=self.ax, node_color=colors, edgecolors='#4A90E2',
+                                      node_size=sizes, alpha=0.9)
+        self._graph_node_collections = []
+        self._graph_base_node_size = 400
+        self._graph_zoom_level = 1.0
+
+        max_w = max((d['weight'] for _, _, d in G.edges(data=True)), default=1)
+        widths = [0.5 + 4.0 * math.log1p(d['weight']) / math.log1p(max_w) for _, _, d in G.edges(data=True)]
+        self._graph_edge_collection = nx.draw_networkx_edges(G, pos, ax=self.ax, edge_color='#A6C8FF',
+                                                             width=widths, alpha=0.6)
+        self._graph_base_line_width = 1.5
+        labels = {c: f"社区{c + 1}\n{comms.sizes[c]}人" for c in G.nodes()}
+        self._graph_label_texts = nx.draw_networkx_labels(G, pos, labels, ax=self.ax, font_size=8,
+                                                          font_family='Microsoft YaHei')
+        self._graph_base_font_size = 8
+        self.status_var.set(f"用户数较多，已按社区聚合显示: 共 {comms.count} 个社区，展示规模最大的 {top} 个")
 
     def _reset_graph_view(self):
         """重置图谱视图到初始全景状态"""
@@ -670,21 +914,74 @@ class App:
             self.r.focus_set()
             self.update_stats_panel(uid)
 
+    def update_overview_panel(self):
+        """刷新网络概览；全网三角形与聚类分析开销较大，统计选项卡可见时才重新计算"""
+        self.lbl_overview_users.config(text=f"用户总数: {len(self.hash_table.get_all_keys())}")
+        popular = self.tag_index.popularity(12)
+        shown = "  |  ".join(f"{tag}: {cnt}人" for tag, cnt in popular)
+        if len(self.tag_index) > len(popular):
+            shown += f"  |  ... 共 {len(self.tag_index)} 种标签"
+        self.lbl_tag_pop.config(text=f"热门标签: {shown or '暂无'}")
+        self._analytics_dirty = True
+        if self.notebook.select() == str(self.tab_stats):
+            self.refresh_network_analytics()
+
+    def _run_in_background(self, fn, on_done, *args):
+        """
+        在后台线程执行 fn(*args)，完成后在界面线程回调 on_done(result, error)
+        """
+        future = self._bg_pool.submit(fn, *args)
+
+        def poll():
+            if not future.done():
+                self.r.after(50, poll)
+                return
+            error = future.exception()
+            on_done(None if error else future.result(), error)
+        self.r.after(50, poll)
+
+    def refresh_network_analytics(self):
+        # 只在读锁内冻结快照 (O(1))，全网统计在后台线程的快照上进行，期间编辑不受阻塞
+        with self.data_lock.read_locked():
+            snap = self.graph.snapshot()
+        self._analytics_dirty = False
+        self._run_in_background(analytics.network_summary, lambda summary, error: self._show_network_summary(snap, summary, error), snap)
+
+    def _show_network_summary(self, snap, summary, error):
+        snap.release()
+        if error is not None:
+            self._analytics_dirty = True
+            self.status_var.set(f"全网统计失败: {error}")
+            return
+        self.lbl_overview_edges.config(
+            text=f"关系总数: {summary['edges']}    平均好友数: {summary['avg_degree']:.2f}    最多好友数: {summary['max_degree']}")
+        self.lbl_an_tri.config(text=f"三角形总数: {summary['triangles']}")
+        self.lbl_an_cc.config(
+            text=f"聚类系数: 全局(传递性) {summary['transitivity']:.4f}    平均局部 {summary['avg_clustering']:.4f}")
+        dist = summary["degree_distribution"]
+        shown = "  |  ".join(f"{d}度: {c}人" for d, c in dist[:12])
+        if len(dist) > 12:
+            shown += f"  |  ... 共 {len(dist)} 种度数"
+        self.lbl_an_deg.config(text=f"度分布: {shown or '暂无'}")
+
     def update_stats_panel(self, uid):
         # 刷新统计面板里的用户信息呈现
         u_info = self.hash_table.get(uid)
         if u_info:
             self.lbl_s_uid.config(text=f"用户ID:   {uid}")
             self.lbl_s_name.config(text=f"姓名:     {u_info['name']}")
-            ints = u_info["interests"].replace(";", ", ")
-            self.lbl_s_int.config(text=f"兴趣:     {ints}")
+            ints = ", ".join(f"{tag}({self.tag_index.count(tag)}人)" for tag in u_info["interests"].split(";") if tag)
+            self.lbl_s_int.config(text=f"兴趣:     {ints or '暂无'}")
             friends = algo.get_first_degree(self.graph, uid)
             self.lbl_s_fri.config(text=f"直接好友数: {len(friends)}")
+            cc, tri = analytics.local_clustering(self.graph, uid)
+            self.lbl_s_cc.config(text=f"聚类系数: {cc:.4f}  (所在三角形 {tri} 个)")
         else:
             self.lbl_s_uid.config(text="用户ID:   暂无")
             self.lbl_s_name.config(text="姓名:     暂无")
             self.lbl_s_int.config(text="兴趣:     暂无")
             self.lbl_s_fri.config(text="直接好友数: 暂无")
+            self.lbl_s_cc.config(text="聚类系数: 暂无")
 
     def _validate_input(self, val):
         if not val or not self.hash_table.get(val):
@@ -702,13 +999,111 @@ class App:
         self.txt.delete("1.0", tk.END)
         self.status_var.set("已清空结果")
 
-    def save_to_disk(self):
+    def save_to_disk(self, on_done=None):
+        """
+        在后台回写数据；写入成功后才在界面线程回调 on_done()，失败时弹出错误提示
+        """
+        if self.store is not None:
+            # SQLite 后端：后台线程在一个事务内提交待写日志中的增量变更
+            def committed(count, error):
+                if error is None:
+                    self.status_var.set(f"持久化存储完成 (写入 {count} 项变更)")
+                    self.out("[系统日志] 持久化存储成功，变更已提交至数据库。", clear=False)
+                    if on_done is not None:
+                        on_done()
+                else:
+                    self.out(f"[系统错误] 持久化存储失败: {error}", clear=False)
+                    messagebox.showerror("持久化异常", str(error))
+            self._run_in_background(self.store.commit, committed)
+            return
+        # 在读锁内同时冻结档案与图谱快照，二者对应同一时刻；写盘在后台进行，期间仍可继续编辑
+        with self.data_lock.read_locked():
+            table_snap = self.hash_table.snapshot()
+            graph_snap = self.graph.snapshot()
+        self.status_var.set("正在后台写入磁盘...")
+
+        def done(_, error):
+            table_snap.release()
+            graph_snap.release()
+            if error is None:
+                self.status_var.set("持久化存储完成")
+                self.out("[系统日志] 持久化存储成功，数据已安全写入磁盘。", clear=False)
+                if on_done is not None:
+                    on_done()
+            else:
+                self.out(f"[系统错误] 持久化存储失败: {error}", clear=False)
+                messagebox.showerror("持久化异常", str(error))
+        self._run_in_background(save_all_data, done, self.user_data_path, self.friend_data_path, table_snap, graph_snap)
+
+    def import_delta_dialog(self):
+        path = filedialog.askopenfilename(
+            title="选择增量变更文件",
+            initialdir=os.path.join(self.base_dir, "data"),
+            filetypes=[("TXT/CSV 文件", "*.txt *.csv"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
         try:
-            save_all_data(self.user_data_path, self.friend_data_path, self.hash_table, self.graph)
-            self.out("[系统日志] 持久化存储成功，数据已安全写入磁盘。", clear=False)
-        except Exception as e:
-            self.out(f"[系统错误] 持久化存储失败: {e}", clear=False)
-            messagebox.showerror("持久化异常", str(e))
+            ops, _, _ = read_delta(path)
+            self._ingest_delta(lambda: apply_delta(ops, self.hash_table, self.graph), os.path.basename(path))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("增量导入失败", str(e))
+
+    def start_delta_watch(self):
+        path = filedialog.askopenfilename(
+            title="选择要监听的增量变更文件 (只处理此后追加的内容)",
+            initialdir=os.path.join(self.base_dir, "data"),
+            filetypes=[("TXT/CSV 文件", "*.txt *.csv"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        already = self._delta_watcher is not None
+        self._delta_watcher = DeltaWatcher(path)
+        if not already:
+            self.r.after(DELTA_POLL_MS, self._poll_delta)
+        self.status_var.set(f"正在监听增量变更: {os.path.basename(path)}")
+
+    def stop_delta_watch(self):
+        if self._delta_watcher is not None:
+            self._delta_watcher = None
+            self.status_var.set("已停止监听增量变更")
+
+    def _poll_delta(self):
+        watcher = self._delta_watcher
+        if watcher is None:
+            return
+        try:
+            self._ingest_delta(lambda: watcher.poll(self.hash_table, self.graph), os.path.basename(watcher.path))
+        except (OSError, ValueError) as e:
+            # 非法变更整批拒绝，停止监听以免每次轮询重复报错
+            self._delta_watcher = None
+            self.out(f"[系统错误] 增量变更应用失败，已停止监听: {e}")
+            return
+        self.r.after(DELTA_POLL_MS, self._poll_delta)
+
+    def _ingest_delta(self, apply_fn, source):
+        """
+        在写锁内应用一批增量变更，随后只刷新受影响的界面部分并回写
+        """
+        start = time.perf_counter()
+        with self.data_lock.write_locked():
+            summary = apply_fn()
+        if summary is None:
+            return
+        elapsed = time.perf_counter() - start
+
+        if summary["users_changed"]:
+            self.refresh_user_combos()
+        if summary["touched"]:
+            self.update_overview_panel()
+            current = self.entry_u1.get().strip().split(" - ")[0]
+            if current in summary["touched"]:
+                self.update_stats_panel(current if self.hash_table.get(current) else "")
+            # 图谱选项卡不可见时只标记待重绘
+            self.draw_graph()
+            self.save_to_disk()
+        self.out(f"[系统日志] 增量导入 {source}: 新增关系 {summary['add_edge']} 条，解除关系 {summary['remove_edge']} 条，"
+                 f"新增/更新用户 {summary['put_user']} 名，注销用户 {summary['remove_user']} 名 ({elapsed * 1000:.0f} ms)。")
 
     def delete_user(self):
         uid = self.entry_u1.get().strip().split(" - ")[0]
@@ -719,21 +1114,21 @@ class App:
         uinfo = self.hash_table.get(uid)
         ans = messagebox.askyesno("危险操作", f"确定要永久注销用户 {uinfo['name']} ({uid}) 单节点及有关的拓扑连线吗？此操作无法撤销。")
         if ans:
-            self.hash_table.remove(uid)
-            self.graph.remove_node(uid)
+            with self.data_lock.write_locked():
+                self.hash_table.remove(uid)
+                self.graph.remove_node(uid)
             
             # 更新下拉框
             self.refresh_user_combos()
             
             # 刷新大屏和当前选中态
-            self.lbl_overview_users.config(text=f"用户总数: {len(self.hash_table.get_all_keys())}")
+            self.update_overview_panel()
             self.entry_u1.delete(0, tk.END)
             self.update_stats_panel("") # 清空当前档案面板
             
             self.draw_graph()
             self.out(f"[系统日志] 用户 {uinfo['name']}({uid}) 的档案及社交关系已被注销清理。", clear=True)
-            self.save_to_disk()
-            messagebox.showinfo("成功", "用户彻底注销成功！")
+            self.save_to_disk(lambda: messagebox.showinfo("成功", "用户彻底注销成功！"))
 
     def show_edit_user_dialog(self):
         uid = self.entry_u1.get().strip().split(" - ")[0]
@@ -783,23 +1178,23 @@ class App:
                 messagebox.showerror("错误", "姓名不能为空！", parent=dialog)
                 return
                 
-            self.hash_table.put(uid, {"name": name, "interests": interests})
-            
-            # 重建好友关系：先清空旧关系，再根据纸片标签重新添加
-            old_neighbors = list(self.graph.get_neighbors(uid))
-            for old_n in old_neighbors:
-                self.graph.remove_edge(uid, old_n)
-            
-            for fid in fp.get_friend_ids():
-                self.graph.add_edge(uid, fid)
+            # 档案与好友关系在一次写锁内整体替换，并发查询不会看到好友被清空的中间状态
+            with self.data_lock.write_locked():
+                self.hash_table.put(uid, UserRecord(name, interests))
+
+                # 按纸片标签替换好友关系：只增删有差异的边
+                added, removed = self.graph.set_neighbors(uid, fp.get_friend_ids())
             
             self.refresh_user_combos()
+            self.update_overview_panel()
             self.update_stats_panel(uid)
-            self.draw_graph()
-            self.out(f"[系统日志] 用户 {name} ({uid}) 档案及好友结构调整完毕。")
-            self.save_to_disk()
-            messagebox.showinfo("成功", "所有信息及关系统一保存至磁盘！", parent=dialog)
+            if added or removed:
+                self.draw_graph()
+            self.out(f"[系统日志] 用户 {name} ({uid}) 档案及好友结构调整完毕"
+                     f" (新增好友 {len(added)} 位，解除好友 {len(removed)} 位)。")
             dialog.destroy()
+            # 回写在后台进行，确认写入磁盘后才提示保存成功
+            self.save_to_disk(lambda: messagebox.showinfo("成功", "所有信息及关系统一保存至磁盘！"))
             
         ttk.Button(dialog, text="保存所有修改并退出", command=confirm_edit, style="Btn3.TButton").pack(pady=10)
 
@@ -857,25 +1252,28 @@ class App:
                 messagebox.showerror("错误", f"用户ID '{uid}' 已存在！", parent=dialog)
                 return
                 
-            # 存入哈希表
-            self.hash_table.put(uid, {"name": name, "interests": interests})
-            
-            for fid in friend_ids:
-                if self.hash_table.get(fid):
-                    self.graph.add_edge(uid, fid)
+            with self.data_lock.write_locked():
+                # 存入哈希表
+                self.hash_table.put(uid, UserRecord(name, interests))
+                self.graph.add_node(uid)
+
+                for fid in friend_ids:
+                    if self.hash_table.get(fid):
+                        self.graph.add_edge(uid, fid)
             
             self.refresh_user_combos()
-            self.lbl_overview_users.config(text=f"用户总数: {len(self.hash_table.get_all_keys())}")
+            self.update_overview_panel()
             self.update_stats_panel(uid)
             self.draw_graph()
             
             self.out(f"[系统日志] 新用户 {name}({uid}) 已接入系统网络。", clear=False)
-            self.save_to_disk()
-            messagebox.showinfo("成功", f"用户 {name} ({uid}) 添加成功！", parent=dialog)
             dialog.destroy()
+            self.save_to_disk(lambda: messagebox.showinfo("成功", f"用户 {name} ({uid}) 添加成功并已保存！"))
             
         ttk.Button(dialog, text="确认添加", command=confirm_add, style="Btn3.TButton").grid(row=4, column=0, columnspan=2, pady=15)
 
+    @instrument("do_1st")
+    @synchronized("read")
     def do_1st(self):
         uid = self.entry_u1.get().strip().split(" - ")[0]
         if self._validate_input(uid):
@@ -885,56 +1283,91 @@ class App:
             self.out(f"=== 用户 {uid} ({u_name}) 的直接好友 ===", clear=True)
             self.out("")
             
+            # 亲密度 (兴趣 + 共同好友) 按边缓存，重复查看无需重算
+            intimacy = dict(self.intimacy.neighbor_weights(uid))
             for fid in res:
                 f_info = self.hash_table.get(fid)
                 if not f_info:
                     continue
                 f_name = f_info['name']
                 f_ints = f_info['interests'].replace(";", ", ")
-                sim = int(algo.get_interest_similarity(self.hash_table.get(uid)['interests'], f_info['interests']) * 10) + 1
+                sim = min(int(intimacy.get(fid, 0.0) * 10) + 1, 10)
                 self.out(f"ID: {fid:>3} | 姓名: {f_name:<4} | 亲密度: {sim} | 兴趣: {f_ints}")
                 
             self.out(f"\n共 {len(res)} 位直接好友。")
             self.status_var.set("查询完成: 直接好友")
             self.update_stats_panel(uid)
 
+    @instrument("do_2nd")
+    @synchronized("read")
     def do_2nd(self):
         uid = self.entry_u1.get().strip().split(" - ")[0]
         if self._validate_input(uid):
-            res_with_paths = algo.get_second_degree_with_paths(self.graph, uid)
+            # 一次遍历统计共同好友数，之后按页从计数中取出，不展开全量列表
+            counts = algo.mutual_friend_counts(self.graph, uid)
+            self._second_pager = {"uid": uid, "counts": counts, "cursor": None, "shown": 0}
             u_name = self.hash_table.get(uid)['name']
-            u_ints_set = set(self.hash_table.get(uid)['interests'].split(";"))
-            
+
             self.out(f"=== 用户 {uid} ({u_name}) 的可能认识的人 (二度人脉) ===", clear=True)
+            self.out(f"共 {len(counts)} 位二度人脉，按共同好友数从多到少排列。")
             self.out("")
-            
-            for fid, path in res_with_paths:
-                f_info = self.hash_table.get(fid)
-                if not f_info:
-                    continue
-                f_name = f_info['name']
-                f_ints = f_info['interests'].replace(";", ", ")
-                f_ints_set = set(f_info['interests'].split(";"))
-                common_ints = len(u_ints_set.intersection(f_ints_set))
+            self._show_second_page()
+            self.update_stats_panel(uid)
 
-                path_display = []
-                for pid in path:
-                    p_info = self.hash_table.get(pid)
-                    p_name = p_info['name'] if p_info else "未知"
-                    path_display.append(f"{pid}({p_name})")
+    @instrument("do_2nd_more")
+    @synchronized("read")
+    def do_2nd_more(self):
+        if not self._second_pager or self._second_pager["cursor"] is None:
+            self.status_var.set("没有更多二度人脉，请先查找二度人脉")
+            return
+        self._show_second_page()
 
-                self.out(f"ID: {fid:>3} | 姓名: {f_name:<4} | 社交距离: 2度 | 共同兴趣: {common_ints} | 兴趣: {f_ints}")
-                self.out(f"连接路径: {' -> '.join(path_display)}")
-                self.out("")
-                
-            self.out(f"\n共 {len(res_with_paths)} 位二度人脉。")
-            self.status_var.set("查询完成: 二度人脉")
-            self.update_stats_panel(uid)
+    def _reset_second_pager(self, *_):
+        # 图谱变化后缓存的共同好友计数失效，需重新查找
+        self._second_pager = None
 
+    def _show_second_page(self):
+        pager = self._second_pager
+        uid = pager["uid"]
+        page, cursor = algo.second_degree_page(self.graph, uid, pager["cursor"],
+                                               SECOND_DEGREE_PAGE_SIZE, pager["counts"])
+        u_info = self.hash_table.get(uid)
+        u_ints_set = set(u_info['interests'].split(";"))
+
+        for fid, mutual, mediators in page:
+            f_info = self.hash_table.get(fid)
+            if not f_info:
+                continue
+            f_name = f_info['name']
+            f_ints = f_info['interests'].replace(";", ", ")
+            f_ints_set = set(f_info['interests'].split(";"))
+            common_ints = len(u_ints_set.intersection(f_ints_set))
+
+            m_names = []
+            for mid in mediators[:3]:
+                m_info = self.hash_table.get(mid)
+                m_names.append(f"{mid}({m_info['name'] if m_info else '未知'})")
+            more = f" 等 {len(mediators)} 人" if len(mediators) > 3 else ""
+
+            self.out(f"ID: {fid:>3} | 姓名: {f_name:<4} | 社交距离: 2度 | 共同好友: {mutual} | 共同兴趣: {common_ints} | 兴趣: {f_ints}")
+            self.out(f"连接路径: {uid}({u_info['name']}) -> {'、'.join(m_names)}{more} -> {fid}({f_name})")
+            self.out("")
+
+        pager["cursor"] = cursor
+        pager["shown"] += len(page)
+        total = len(pager["counts"])
+        if cursor is not None:
+            self.out(f"已显示 {pager['shown']} / {total} 位，点击 [更多二度人脉] 继续加载。")
+        else:
+            self.out(f"\n共 {total} 位二度人脉。")
+        self.status_var.set(f"查询完成: 二度人脉 ({pager['shown']}/{total})")
+
+    @instrument("do_rec")
+    @synchronized("read")
     def do_rec(self):
         uid = self.entry_u1.get().strip().split(" - ")[0]
         if self._validate_input(uid):
-            res = algo.recommend_top_k(self.graph, self.hash_table, uid, 5) # 匹配图片标注的 Top-5
+            res = self.rec_cache.recommend(uid, 5) # 匹配图片标注的 Top-5，重复查看直接命中缓存
             u_name = self.hash_table.get(uid)['name']
             u_ints_set = set(self.hash_table.get(uid)['interests'].split(";"))
             
@@ -954,9 +1387,123 @@ class App:
                 idx += 1
                 
             self.out(f"\n共生成 {len(res)} 条推荐。")
-            self.status_var.set("推荐完成: 智能推荐")
+            self.status_var.set(f"推荐完成: 智能推荐 (缓存命中率 {self.rec_cache.stats()['hit_rate']:.0%})")
+            self.update_stats_panel(uid)
+
+    @instrument("do_tag_search")
+    @synchronized("read")
+    def do_tag_search(self):
+        tags = parse_tag_query(self.entry_tags.get())
+        if not tags:
+            messagebox.showwarning("提示", "请输入要检索的兴趣标签，多个标签以空格或分号分隔。")
+            return
+        match_all = self.tag_mode_var.get() == "all"
+        res = self.tag_index.query_all(tags) if match_all else self.tag_index.query_any(tags)
+
+        joiner = " 且 " if match_all else " 或 "
+        self.out(f"=== 兴趣标签检索: {joiner.join(tags)} ===", clear=True)
+        self.out("各标签人数: " + ", ".join(f"{tag} {self.tag_index.count(tag)}人" for tag in tags))
+        self.out("")
+        for uid in res[:TAG_SEARCH_LIMIT]:
+            info = self.hash_table.get(uid)
+            if info:
+                self.out(f"ID: {uid:>3} | 姓名: {info['name']:<4} | 兴趣: {info['interests'].replace(';', ', ')}")
+        if len(res) > TAG_SEARCH_LIMIT:
+            self.out(f"... 仅显示前 {TAG_SEARCH_LIMIT} 位")
+        self.out(f"\n共找到 {len(res)} 位用户。")
+        self.notebook.select(self.tab_result)
+        self.status_var.set("查询完成: 兴趣标签检索")
+
+    @instrument("do_similar")
+    @synchronized("read")
+    def do_similar(self):
+        uid = self.entry_u1.get().strip().split(" - ")[0]
+        if self._validate_input(uid):
+            u_info = self.hash_table.get(uid)
+            u_ints_set = set(u_info['interests'].split(";"))
+            res = self.interest_index.query(user_id=uid, k=10)
+
+            self.out(f"=== 与 用户 {uid} ({u_info['name']}) 兴趣相投的人 (MinHash LSH) ===", clear=True)
+            self.out("")
+            for sim, fid in res:
+                f_info = self.hash_table.get(fid)
+                if not f_info:
+                    continue
+                common = "、".join(sorted(u_ints_set.intersection(f_info['interests'].split(";"))))
+                self.out(f"ID: {fid:>3} | 姓名: {f_info['name']:<4} | 兴趣相似度: {sim:.2f} | 共同兴趣: {common}")
+            self.out(f"\n共找到 {len(res)} 位兴趣相投的用户。")
+            self.status_var.set("查询完成: 兴趣相投")
             self.update_stats_panel(uid)
 
+    @instrument("do_influence")
+    def do_influence(self):
+        # PageRank 与特征向量中心性都要多轮遍历全图，与桥梁用户一样在后台线程的快照上计算
+        import algorithm.centrality as centrality
+        if self.pagerank is None:
+            self.pagerank = centrality.PageRank()
+        with self.data_lock.read_locked():
+            snap = self.graph.snapshot()
+        self.status_var.set("正在计算影响力排行...")
+        self._run_in_background(self._compute_influence,
+                                lambda result, error: self._show_influence(snap, result, error), snap)
+
+    def _compute_influence(self, snap):
+        import algorithm.centrality as centrality
+        # 后台线程池只有一个工作线程，PageRank 的热启动状态不会被并发修改
+        scores = self.pagerank.compute(snap)
+        return scores, centrality.degree_centrality(snap), centrality.eigenvector_centrality(snap)
+
+    @synchronized("read")
+    def _show_influence(self, snap, result, error):
+        snap.release()
+        if error is not None:
+            self.status_var.set(f"影响力排行计算失败: {error}")
+            return
+        import algorithm.centrality as centrality
+        scores, deg_c, eig_c = result
+        top = centrality.top_influencers(scores, self.hash_table, 10)
+
+        self.out("=== 社交网络影响力排行 (PageRank Top-10) ===", clear=True)
+        self.out("")
+        for idx, (score, uid, name) in enumerate(top, start=1):
+            friends = len(self.graph.get_neighbors(uid))
+            self.out(f"第 {idx:>2} 名: ID: {uid:>3} | 姓名: {name:<4} | PageRank: {score:.4f} | "
+                     f"度中心性: {deg_c.get(uid, 0.0):.3f} | 特征向量中心性: {eig_c.get(uid, 0.0):.3f} | 好友数: {friends}")
+        self.out(f"\n幂迭代收敛轮数: {self.pagerank.iterations}")
+        self.status_var.set("计算完成: 影响力排行")
+
+    def do_brokers(self):
+        # 介数中心性要从每个源点各做一次 BFS，在后台线程的快照上计算，大图只抽样部分源点
+        # 中心性模块依赖 NumPy，首次使用时才导入，不拖慢主窗口启动
+        import algorithm.centrality as centrality
+        with self.data_lock.read_locked():
+            snap = self.graph.snapshot()
+        n = len(snap.get_all_nodes())
+        sample = BETWEENNESS_SAMPLE if n > BETWEENNESS_SAMPLE else None
+        self.status_var.set("正在计算桥梁用户 (介数中心性)...")
+        self._run_in_background(centrality.betweenness_centrality,
+                                lambda scores, error: self._show_brokers(snap, scores, error, sample), snap, sample)
+
+    @synchronized("read")
+    def _show_brokers(self, snap, scores, error, sample):
+        snap.release()
+        if error is not None:
+            self.status_var.set(f"桥梁用户计算失败: {error}")
+            return
+        import algorithm.centrality as centrality
+        top = centrality.top_influencers(scores, self.hash_table, 10)
+        self.out("=== 桥梁用户排行 (介数中心性 Top-10) ===", clear=True)
+        self.out("")
+        for idx, (score, uid, name) in enumerate(top, start=1):
+            friends = len(self.graph.get_neighbors(uid))
+            self.out(f"第 {idx:>2} 名: ID: {uid:>3} | 姓名: {name:<4} | 介数中心性: {score:.4f} | 好友数: {friends}")
+        self.out("\n介数中心性 = 经过该用户的最短路占全部节点对的比例，得分高者连接着不同的社交圈子。")
+        if sample:
+            self.out(f"用户较多，按 {sample} 个随机源点抽样估计。")
+        self.status_var.set("计算完成: 桥梁用户")
+
+    @instrument("do_dist")
+    @synchronized("read")
     def do_dist(self):
         u1 = self.entry_u1.get().strip().split(" - ")[0]
         if self._validate_input(u1):
@@ -981,8 +1528,83 @@ class App:
                         p_name = p_info['name'] if p_info else '未知'
                         path_names.append(f"[{pid} {p_name}]")
                     self.out(f"探测连通路径: {' -> '.join(path_names)}")
+                    strength, strong = strongest_path(self.graph, self.intimacy, u1, u2)
+                    strong_names = []
+                    for pid in strong:
+                        p_info = self.hash_table.get(pid)
+                        strong_names.append(f"[{pid} {p_info['name'] if p_info else '未知'}]")
+                    self.out(f"\n最强引荐路径 ({len(strong) - 1} 跳，路径强度 {strength:.3f}): {' -> '.join(strong_names)}")
+                    self.out("路径强度 = 沿途各段好友关系强度之积，关系强度由共同兴趣与共同好友决定。")
                 self.status_var.set("计算完成: 社交距离")
 
+    def show_startup_report(self):
+        messagebox.showinfo("启动耗时报告", self.startup.report())
+
+    def show_profiler_view(self):
+        """性能统计窗口：展示各埋点最近耗时，并支持导出 JSON 统计与 cProfile 转储"""
+        dialog = tk.Toplevel(self.r)
+        dialog.title("性能统计")
+        dialog.minsize(720, 360)
+        dialog.configure(bg='#F0F6FB')
+
+        columns = ("calls", "last", "mean", "max", "blocks")
+        headings = ("调用次数", "最近(ms)", "平均(ms)", "最大(ms)", "净分配块")
+        tree = ttk.Treeview(dialog, columns=columns, height=12)
+        tree.heading("#0", text="埋点")
+        tree.column("#0", width=220)
+        for col, text in zip(columns, headings):
+            tree.heading(col, text=text)
+            tree.column(col, width=90, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        state_var = tk.StringVar()
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            for name, st in PROFILER.snapshot().items():
+                tree.insert("", tk.END, text=name, values=(
+                    st["calls"], st["last_ms"], st["mean_ms"], st["max_ms"], st["alloc_blocks"]))
+            state_var.set("采集状态: 已开启" if PROFILER.enabled else "采集状态: 未开启 (点击【开启/停止采集】后再执行查询)")
+
+        def toggle():
+            if PROFILER.enabled:
+                PROFILER.disable()
+            else:
+                PROFILER.enable(cprofile=True)
+            refresh()
+
+        def reset():
+            was_enabled = PROFILER.enabled
+            PROFILER.reset()
+            if was_enabled:
+                PROFILER.enable(cprofile=True)
+            refresh()
+
+        def export_json():
+            path = filedialog.asksaveasfilename(parent=dialog, defaultextension=".json",
+                                                filetypes=[("JSON 文件", "*.json")])
+            if path:
+                PROFILER.export_json(path)
+                self.status_var.set(f"性能统计已导出: {path}")
+
+        def export_cprofile():
+            path = filedialog.asksaveasfilename(parent=dialog, defaultextension=".prof",
+                                                filetypes=[("cProfile 转储", "*.prof")])
+            if path and not PROFILER.dump_cprofile(path):
+                messagebox.showwarning("提示", "cProfile 未在运行，请先开启采集。", parent=dialog)
+            elif path:
+                self.status_var.set(f"cProfile 转储已导出: {path}")
+
+        btn_f = tk.Frame(dialog, bg='#F0F6FB')
+        btn_f.pack(fill=tk.X, padx=10, pady=(0, 10))
+        tk.Label(btn_f, textvariable=state_var, bg='#F0F6FB').pack(side=tk.LEFT)
+        ttk.Button(btn_f, text="导出 cProfile", command=export_cprofile, style="Btn9.TButton").pack(side=tk.RIGHT, padx=2)
+        ttk.Button(btn_f, text="导出 JSON", command=export_json, style="Btn8.TButton").pack(side=tk.RIGHT, padx=2)
+        ttk.Button(btn_f, text="清零", command=reset, style="Btn6.TButton").pack(side=tk.RIGHT, padx=2)
+        ttk.Button(btn_f, text="刷新", command=refresh, style="Btn5.TButton").pack(side=tk.RIGHT, padx=2)
+        ttk.Button(btn_f, text="开启/停止采集", command=toggle, style="Btn4.TButton").pack(side=tk.RIGHT, padx=2)
+        refresh()
+
     def show_about(self):
         messagebox.showinfo(
             "关于", 
@@ -1081,5 +1703,8 @@ if __name__ == "__main__":
         style.map(style_name, background=[('active', '#F0F6FB')])
         
     app = App(root)
+    if "--startup-report" in sys.argv:
+        # 窗口可交互后在终端输出启动阶段耗时，便于对比优化效果
+        root.after_idle(lambda: print(app.startup.report()))
     root.mainloop()
 
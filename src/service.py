@@ -0,0 +1,506 @@
+﻿"""
+本地 asyncio JSON 查询服务
+
+为内部工具提供无界面的 HTTP/JSON 查询接口：进程启动时一次性装载 Graph / HashTable，
+随后通过 asyncio 事件循环处理连接；BFS、推荐等 CPU 密集型查询放入线程池执行，
+保证并发请求之间互不阻塞。同时内置压测客户端，用于测量本机 p50 / p99 延迟。
+
+接口一览 (均返回 JSON):
+    GET  /first?user=1                  一度人脉
+    GET  /second?user=1&limit=20        二度人脉 (按共同好友数排序，next_cursor 非空时以 &cursor= 翻页)
+    GET  /distance?user=1&target=7      最短社交距离
+    GET  /strongest?user=1&target=7     亲密度加权的最强引荐路径
+    GET  /recommend?user=1&k=5          Top-K 智能推荐
+    GET  /users/<uid>                   用户档案
+    POST /users                         新增用户 {"name", "interests", "friends", "id"(可选)}
+    PUT  /users/<uid>                   修改用户 {"name", "interests", "friends"(可选)}
+    DELETE /users                       批量注销用户 {"ids": [...]}
+
+用法示例:
+    python src/service.py serve --port 8765
+    python src/service.py serve --db data/social.db --save
+    python src/service.py bench --port 8765 --requests 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from data_structure.hash_table import HashTable
+from data_structure.adjacency_list import Graph
+from data_structure.user_record import UserRecord
+from utils.data_reader import load_all_data, save_all_data
+from utils.sqlite_store import open_store
+from cli import DEFAULT_USER_PATH, DEFAULT_FRIEND_PATH
+import algorithm.algorithms as algo
+from algorithm.intimacy import IntimacyWeights, strongest_path
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """携带 HTTP 状态码的业务异常，由请求分发层统一转成 JSON 错误响应"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadWriteGate:
+    """
+    事件循环内的读写闸门
+
+    查询在线程池中并发执行，而增改操作会修改邻接表与哈希表；
+    写操作需等待在途查询全部结束，期间新查询排队等待，避免 BFS 遍历到修改了一半的结构。
+    """
+    def __init__(self):
+        self._cond = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+
+    async def acquire_read(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._writer)
+            self._readers += 1
+
+    async def release_read(self):
+        async with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    async def acquire_write(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._writer)
+            self._writer = True
+            await self._cond.wait_for(lambda: self._readers == 0)
+
+    async def release_write(self):
+        async with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class QueryService:
+    """
+    社交图谱查询服务：持有唯一一份 Graph / HashTable，并把 HTTP 路由映射到算法层
+    """
+    def __init__(self, user_path, friend_path, workers=4, save=False, db_path=None):
+        self.user_path = user_path
+        self.friend_path = friend_path
+        self.save = save
+        self.graph = Graph()
+        self.hash_table = HashTable()
+        self.store = None
+        if db_path:
+            # SQLite 后端：库为空时先从数据文件导入；回写只提交每次请求产生的增量变更
+            self.store = open_store(db_path, user_path, friend_path)
+            self.store.load(self.hash_table, self.graph)
+            if save:
+                self.store.attach(self.hash_table, self.graph)
+        else:
+            load_all_data(user_path, friend_path, self.hash_table, self.graph)
+        # 好友亲密度按边缓存，修改请求经变更回调只失效受影响的边
+        self.intimacy = IntimacyWeights(self.graph, self.hash_table).attach()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.gate = None  # 需在事件循环内创建
+
+    # ---------- 查询 (线程池内执行) ----------
+
+    def _require_user(self, uid):
+        if not uid or not self.hash_table.get(uid):
+            raise HttpError(404, f"非法的ID或者ID不在库内: {uid}")
+        return uid
+
+    def _user_payload(self, uid):
+        info = self.hash_table.get(uid)
+        return {"id": uid, "name": info["name"], "interests": info["interests"],
+                "friends": list(self.graph.get_neighbors(uid))}
+
+    def q_first(self, params):
+        uid = self._require_user(_param(params, "user"))
+        return {"user": uid, "friends": [
+            {"id": fid, "name": self.hash_table.get(fid)["name"]}
+            for fid in algo.get_first_degree(self.graph, uid) if self.hash_table.get(fid)
+        ]}
+
+    def q_second(self, params):
+        uid = self._require_user(_param(params, "user"))
+        try:
+            limit = int(params.get("limit", ["20"])[0])
+        except ValueError:
+            raise HttpError(400, "参数 limit 必须为整数")
+        try:
+            cursor = algo.parse_cursor(params.get("cursor", [""])[0])
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        if limit <= 0:
+            raise HttpError(400, "参数 limit 必须为正整数")
+        page, next_cursor = algo.second_degree_page(self.graph, uid, cursor, limit)
+        return {"user": uid, "contacts": [
+            {"id": fid, "name": self.hash_table.get(fid)["name"], "mutual_friends": mutual,
+             "path": [uid, mediators[0], fid]}
+            for fid, mutual, mediators in page if self.hash_table.get(fid)
+        ], "next_cursor": algo.format_cursor(next_cursor) or None}
+
+    def q_distance(self, params):
+        uid = self._require_user(_param(params, "user"))
+        target = self._require_user(_param(params, "target"))
+        dist, path = algo.shortest_distance(self.graph, uid, target)
+        return {"user": uid, "target": target, "distance": dist, "path": path}
+
+    def q_strongest(self, params):
+        uid = self._require_user(_param(params, "user"))
+        target = self._require_user(_param(params, "target"))
+        strength, path = strongest_path(self.graph, self.intimacy, uid, target)
+        return {"user": uid, "target": target, "strength": round(strength, 6), "path": path}
+
+    def q_recommend(self, params):
+        uid = self._require_user(_param(params, "user"))
+        try:
+            k = int(params.get("k", ["5"])[0])
+        except ValueError:
+            raise HttpError(400, "参数 k 必须为整数")
+        if k <= 0:
+            raise HttpError(400, "参数 k 必须为正整数")
+        weights = None
+        if "weights" in params:
+            try:
+                weights = algo.parse_weights(params["weights"][0])
+            except ValueError as e:
+                raise HttpError(400, str(e))
+        return {"user": uid, "recommendations": [
+            {"id": cid, "name": name, "score": score}
+            for score, cid, name in algo.recommend_top_k(self.graph, self.hash_table, uid, k, weights=weights)
+        ]}
+
+    def q_user(self, uid):
+        return self._user_payload(self._require_user(uid))
+
+    # ---------- 增改 (持有写闸门时在事件循环线程内执行) ----------
+
+    def _next_id(self):
+        max_id = 0
+        for k in self.hash_table.get_all_keys():
+            try:
+                max_id = max(max_id, int(k))
+            except ValueError:
+                pass
+        return str(max_id + 1)
+
+    def _validate_profile(self, body, partial=False):
+        name = str(body.get("name", "")).strip()
+        if not name and not partial:
+            raise HttpError(400, "姓名不能为空！")
+        friends = body.get("friends")
+        if friends is not None:
+            if not isinstance(friends, list):
+                raise HttpError(400, "friends 必须为用户 ID 列表")
+            friends = [str(f).strip() for f in friends]
+            for fid in friends:
+                if not self.hash_table.get(fid):
+                    raise HttpError(400, f"好友引用了不存在的用户: {fid}")
+        interests = body.get("interests", "")
+        if isinstance(interests, list):
+            interests = ";".join(str(t).strip() for t in interests if str(t).strip())
+        return name, str(interests), friends
+
+    def m_add_user(self, body):
+        name, interests, friends = self._validate_profile(body)
+        uid = str(body.get("id", "")).strip() or self._next_id()
+        if "," in uid:
+            raise HttpError(400, "用户ID不能包含逗号")
+        if self.hash_table.get(uid):
+            raise HttpError(409, f"用户ID '{uid}' 已存在！")
+        self.hash_table.put(uid, UserRecord(name, interests))
+        self.graph.add_node(uid)
+        for fid in friends or []:
+            if fid != uid:
+                self.graph.add_edge(uid, fid)
+        self._persist()
+        return self._user_payload(uid)
+
+    def m_edit_user(self, uid, body):
+        self._require_user(uid)
+        old = self.hash_table.get(uid)
+        name, interests, friends = self._validate_profile(body, partial=True)
+        self.hash_table.put(uid, UserRecord(
+            name or old["name"],
+            interests if "interests" in body else old["interests"],
+        ))
+        if friends is not None:
+            # 与 GUI 修改档案一致：按新好友列表替换，只增删有差异的边
+            added, removed = self.graph.set_neighbors(uid, friends)
+        self._persist()
+        payload = self._user_payload(uid)
+        if friends is not None:
+            payload["friends_added"] = added
+            payload["friends_removed"] = removed
+        return payload
+
+    def m_purge_users(self, body):
+        ids = body.get("ids")
+        if not isinstance(ids, list) or not ids:
+            raise HttpError(400, "ids 必须为非空的用户ID列表")
+        # 重复的ID只计一次，否则会被同时计入 removed 与 not_found
+        ids = list(dict.fromkeys(str(uid).strip() for uid in ids))
+        # 档案按桶批量摘除，关系一次性重建受影响的邻接表，整批只回写一次
+        removed = self.hash_table.remove_many(ids)
+        former = self.graph.remove_nodes(uid for uid, _ in removed)
+        if removed:
+            self._persist()
+        return {"removed": [{"id": uid, "friends_removed": len(former.get(uid, ()))} for uid, _ in removed],
+                "not_found": len(ids) - len(removed)}
+
+    def _persist(self):
+        if not self.save:
+            return
+        if self.store is not None:
+            self.store.commit()
+        else:
+            save_all_data(self.user_path, self.friend_path, self.hash_table, self.graph)
+
+    # ---------- 路由分发 ----------
+
+    async def _run_read(self, fn, *args):
+        await self.gate.acquire_read()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            await self.gate.release_read()
+
+    async def _run_write(self, fn, *args):
+        # 写操作 (含回写文件或提交数据库) 同样放入线程池，持有写闸门期间事件循环仍可接收新连接
+        await self.gate.acquire_write()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            await self.gate.release_write()
+
+    async def dispatch(self, method, target, body):
+        parts = urlsplit(target)
+        path = parts.path.rstrip("/") or "/"
+        params = parse_qs(parts.query)
+        queries = {"/first": self.q_first, "/second": self.q_second,
+                   "/distance": self.q_distance, "/strongest": self.q_strongest,
+                   "/recommend": self.q_recommend}
+
+        if path in queries:
+            if method != "GET":
+                raise HttpError(405, "仅支持 GET")
+            return 200, await self._run_read(queries[path], params)
+        if path == "/users":
+            if method == "POST":
+                return 201, await self._run_write(self.m_add_user, _json_body(body))
+            if method == "DELETE":
+                return 200, await self._run_write(self.m_purge_users, _json_body(body))
+            raise HttpError(405, "仅支持 POST / DELETE")
+        if path.startswith("/users/"):
+            uid = unquote(path[len("/users/"):])
+            if method == "GET":
+                return 200, await self._run_read(self.q_user, uid)
+            if method == "PUT":
+                return 200, await self._run_write(self.m_edit_user, uid, _json_body(body))
+            raise HttpError(405, "仅支持 GET / PUT")
+        raise HttpError(404, f"未知接口: {path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(_encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.gate = ReadWriteGate()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"[系统日志] 查询服务已启动: http://{host}:{port}  "
+              f"(用户 {len(self.hash_table.get_all_keys())} 名)", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def _param(params, name):
+    values = params.get(name)
+    if not values:
+        raise HttpError(400, f"缺少参数: {name}")
+    return values[0].strip()
+
+
+def _json_body(body):
+    try:
+        data = json.loads(body.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise HttpError(400, "请求体不是合法的 JSON")
+    if not isinstance(data, dict):
+        raise HttpError(400, "请求体必须为 JSON 对象")
+    return data
+
+
+async def _read_request(reader):
+    """
+    解析一条 HTTP/1.1 请求；连接正常关闭时返回 None
+
+    Returns:
+        tuple | None: (方法, 请求目标, 小写化的头部字典, 请求体 bytes)
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = h.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0") or 0)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def _encode_response(status, payload, keep_alive=True):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + data
+
+
+# ---------- 内置压测客户端 ----------
+
+def _percentile(sorted_vals, pct):
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, int(round(pct / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+async def run_load(host, port, paths, total, concurrency):
+    """
+    以 concurrency 条长连接并发压测，共发出 total 个请求，轮询使用 paths 中的接口
+
+    Returns:
+        dict: 请求数、错误数、吞吐量及 p50 / p90 / p99 / max 延迟 (毫秒)
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                path = paths[i % len(paths)]
+                t0 = time.perf_counter()
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+                await writer.drain()
+                status_line = await reader.readline()
+                length = 0
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b""):
+                        break
+                    key, _, value = h.decode("latin-1").partition(":")
+                    if key.strip().lower() == "content-length":
+                        length = int(value.strip())
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - t0)
+                if b" 200 " not in status_line:
+                    errors += 1
+        finally:
+            writer.close()
+
+    t_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t_start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(_percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="service.py", description="社交网络分析系统 - 本地 JSON 查询服务")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    serve = sub.add_parser("serve", help="启动查询服务")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--workers", type=int, default=4, help="查询线程池大小")
+    serve.add_argument("--users", default=DEFAULT_USER_PATH, help="用户信息文件 (CSV)")
+    serve.add_argument("--friends", default=DEFAULT_FRIEND_PATH, help="好友关系文件 (TXT)")
+    serve.add_argument("--save", action="store_true", help="增改用户后回写数据文件 (或提交至数据库)")
+    serve.add_argument("--db", help="改用 SQLite 数据库存储 (库为空时由 --users/--friends 导入)")
+
+    bench = sub.add_parser("bench", help="对本机服务进行压测并输出延迟分位数")
+    bench.add_argument("--host", default="127.0.0.1")
+    bench.add_argument("--port", type=int, default=8765)
+    bench.add_argument("--requests", type=int, default=1000)
+    bench.add_argument("--concurrency", type=int, default=16)
+    bench.add_argument("--path", action="append", dest="paths",
+                       help="压测接口，可重复指定；缺省混合四类查询")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.mode == "serve":
+        try:
+            service = QueryService(args.users, args.friends, workers=args.workers, save=args.save,
+                                   db_path=args.db)
+        except ValueError as e:
+            sys.stderr.write(f"[错误] {e}\n")
+            return 1
+        try:
+            asyncio.run(service.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    paths = args.paths or ["/first?user=1", "/second?user=1",
+                           "/distance?user=1&target=2", "/recommend?user=1&k=5"]
+    report = asyncio.run(run_load(args.host, args.port, paths, args.requests, args.concurrency))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report["errors"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
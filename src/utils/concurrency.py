@@ -0,0 +1,118 @@
+﻿"""
+并发访问控制模块
+
+Graph 与 HashTable 本身不做任何同步。当查询在工作线程中执行、而界面线程同时修改档案与好友关系时，
+由本模块的读写锁统一保护：
+1. 多个读者 (BFS、推荐、统计、回写磁盘) 可同时持有读锁并行执行
+2. 写者独占；"先清空旧关系再重新连线" 这类多步修改在一次写锁内完成，读者不会看到中间状态
+3. 写者优先：有写者排队时新的读者等待，避免写操作被源源不断的查询饿死
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    写者优先的读写锁
+
+    读锁与写锁均可由同一线程重入；持有写锁时还可获取读锁，便于修改流程中调用只读的辅助函数；
+    不支持由读锁升级为写锁 (持有读锁时请求写锁会死锁)。
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writers_waiting = 0
+        self._writer = None       # 持有写锁的线程 ID
+        self._write_depth = 0
+        self._local = threading.local()
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                # 写者内部的读取直接放行
+                self._local.nested = getattr(self._local, "nested", 0) + 1
+                return
+            held = getattr(self._local, "reads", 0)
+            # 已持有读锁的线程重入时不再等待排队的写者，否则会与之互相等待
+            while not held and (self._writer is not None or self._writers_waiting):
+                self._cond.wait()
+            self._readers += 1
+            self._local.reads = held + 1
+
+    def release_read(self):
+        with self._cond:
+            if self._writer == threading.get_ident() and getattr(self._local, "nested", 0):
+                self._local.nested -= 1
+                return
+            self._readers -= 1
+            self._local.reads -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("当前线程未持有写锁")
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        """
+        with lock.read_locked(): 只读访问图谱与档案
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        """
+        with lock.write_locked(): 独占修改，块内的多步修改对读者表现为一次原子变更
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def synchronized(mode="read", lock_attr="data_lock"):
+    """
+    方法装饰器：在实例的读写锁保护下执行整个方法
+
+    Args:
+        mode (str): "read" 共享读 或 "write" 独占写
+        lock_attr (str): 实例上 RWLock 属性的名称
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            lock = getattr(self, lock_attr)
+            ctx = lock.read_locked() if mode == "read" else lock.write_locked()
+            with ctx:
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -5,6 +5,68 @@
 含有鲁棒型的脏数据防崩溃与类型捕获异常流转。
 """
 
+from data_structure.id_registry import uid_sort_key
+from data_structure.user_record import UserRecord
+from utils.profiler import instrument
+
+
+def iter_user_rows(user_path):
+    """
+    逐行解析用户画像文件 (需含表头)
+
+    Yields:
+        tuple[str, str, str]: (用户ID, 姓名, 兴趣标签串)
+
+    Raises:
+        ValueError: 行格式错误或缺少必要字段
+    """
+    with open(user_path, "r", encoding="utf-8-sig") as f:
+        next(f, None)  # 跳过首行表头内容
+        for line_no, line in enumerate(f, start=2):
+            raw = line.strip()
+            if not raw:
+                continue
+            parts = raw.split(",", 2)
+            if len(parts) < 3:
+                raise ValueError(f"用户信息格式错误(第{line_no}行): {raw}")
+
+            uid = parts[0].strip()
+            name = parts[1].strip()
+            if not uid or not name:
+                raise ValueError(f"用户信息缺少必要字段(第{line_no}行): {raw}")
+            yield uid, name, parts[2].strip()
+
+
+def iter_friend_pairs(friend_path):
+    """
+    逐行解析好友关系文件
+
+    Yields:
+        tuple[int, str, str]: (行号, 用户ID, 用户ID)
+
+    Raises:
+        ValueError: 行格式错误或缺少用户ID
+    """
+    with open(friend_path, "r", encoding="utf-8-sig") as f:
+        for line_no, line in enumerate(f, start=1):
+            raw = line.strip()
+            if not raw:
+                continue
+            parts = raw.split(",")
+            if len(parts) != 2:
+                raise ValueError(f"好友关系格式错误(第{line_no}行): {raw}")
+
+            u = parts[0].strip()
+            v = parts[1].strip()
+            # 兼容包含表头的关系文件
+            if line_no == 1 and "用户" in u and "ID" in u:
+                continue
+            if not u or not v:
+                raise ValueError(f"好友关系缺少用户ID(第{line_no}行): {raw}")
+            yield line_no, u, v
+
+
+@instrument()
 def load_all_data(user_path, friend_path, hash_table, graph):
     """
     挂载所有的物理测试文件数据到数据结构骨架之上
@@ -13,86 +75,78 @@ def load_all_data(user_path, friend_path, hash_table, graph):
         user_path (str): 用户基础画像表位置 (需含表头)
         friend_path (str): 拓扑关系交集表位置
         hash_table (HashTable): 注入用户基本信息的目的地结构
-        graph (Graph): 构造网络连通边的目的地邻接表
+        graph (Graph): 构造网络连通边的目的地邻接表；传入 None 时只装载用户档案
 
     Raises:
         ValueError: 从底层接管异常抛往上端展现给用户
     """
     try:
-        with open(user_path, "r", encoding="utf-8-sig") as f:
-            lines = f.readlines()
-            for i in range(1, len(lines)):  # 跳过首行表头内容
-                raw = lines[i].strip()
-                if not raw:
-                    continue
-                parts = raw.split(",", 2)
-                if len(parts) < 3:
-                    raise ValueError(f"用户信息格式错误(第{i + 1}行): {raw}")
-
-                uid = parts[0].strip()
-                name = parts[1].strip()
-                interests = parts[2].strip()
-                if not uid or not name:
-                    raise ValueError(f"用户信息缺少必要字段(第{i + 1}行): {raw}")
-
-                # 记录核心用户兴趣元数据
-                hash_table.put(uid, {"name": name, "interests": interests})
-                # 保证无好友关系的孤立用户也进入图结构
+        for uid, name, interests in iter_user_rows(user_path):
+            # 记录核心用户兴趣元数据
+            hash_table.put(uid, UserRecord(name, interests))
+            # 保证无好友关系的孤立用户也进入图结构
+            if graph is not None:
                 graph.add_node(uid)
+        if graph is None:
+            return
 
-        with open(friend_path, "r", encoding="utf-8-sig") as f:
-            for line_no, line in enumerate(f, start=1):
-                raw = line.strip()
-                if not raw:
-                    continue
-                parts = raw.split(",")
-                if len(parts) != 2:
-                    raise ValueError(f"好友关系格式错误(第{line_no}行): {raw}")
-
-                u = parts[0].strip()
-                v = parts[1].strip()
-                # 兼容包含表头的关系文件
-                if line_no == 1 and "用户" in u and "ID" in u:
-                    continue
-                if not u or not v:
-                    raise ValueError(f"好友关系缺少用户ID(第{line_no}行): {raw}")
-                if not hash_table.get(u) or not hash_table.get(v):
-                    raise ValueError(f"好友关系引用了不存在的用户(第{line_no}行): {raw}")
-                # 并入图网络无向连线
-                graph.add_edge(u, v)
+        for line_no, u, v in iter_friend_pairs(friend_path):
+            if not hash_table.get(u) or not hash_table.get(v):
+                raise ValueError(f"好友关系引用了不存在的用户(第{line_no}行): {u},{v}")
+            # 并入图网络无向连线
+            graph.add_edge(u, v)
     except Exception as e:
         raise ValueError("文件物理拉取异常崩溃: " + str(e))
 
+
+@instrument()
+def build_graph_store(user_path, friend_path, directory, shards=16, cache_size=1_000_000):
+    """
+    以流式两遍扫描把好友关系文件转换为磁盘分片邻接存储 (见 data_structure.sharded_graph)
+
+    全程只在内存中保留用户ID与每人的度数，邻接数据直接写入内存映射的分片文件，
+    可用于转换超出内存容量的关系网络。
+
+    Returns:
+        ShardedGraph: 打开后的只读存储
+    """
+    from data_structure.sharded_graph import ShardedGraph
+    try:
+        ids = [uid for uid, _, _ in iter_user_rows(user_path)]
+        return ShardedGraph.build(directory, ids, lambda: iter_friend_pairs(friend_path), shards, cache_size)
+    except Exception as e:
+        raise ValueError("分片存储构建失败: " + str(e))
+
+
+@instrument()
 def save_all_data(user_path, friend_path, hash_table, graph):
     """
     将内存中的用户哈希表与关系图序列化回写至物理文件中实现持久化
     """
     try:
-        def _sort_uid(uid):
-            uid_str = str(uid)
-            if uid_str.isdigit():
-                return (0, int(uid_str))
-            return (1, uid_str)
-
         # 重写用户档案 (带表头)
         with open(user_path, "w", encoding="utf-8") as f:
             f.write("用户ID,姓名,兴趣标签\n")
             # 排序保障文本的顺序一致性
-            sorted_keys = sorted(hash_table.get_all_keys(), key=_sort_uid)
+            sorted_keys = sorted(hash_table.get_all_keys(), key=uid_sort_key)
             for uid in sorted_keys:
                 uinfo = hash_table.get(uid)
                 f.write(f"{uid},{uinfo['name']},{uinfo['interests']}\n")
                 
         # 重写好友无向图关系 (去重写入)
-        written_edges = set()
+        # 在 CSR 快照上按整数名次排序，每个ID只解析一次排序键
+        cg = graph.compact()
+        ids = cg.nodes
+        rank = cg.registry.ranks()
+        order = sorted(range(len(ids)), key=rank.__getitem__)
         with open(friend_path, "w", encoding="utf-8") as f:
-            for u in sorted(graph.get_all_nodes(), key=_sort_uid):
-                for v in sorted(graph.get_neighbors(u), key=_sort_uid):
-                    # 为了无向图不写两遍 1,2 和 2,1，统一按从小到大排序形成 tuple 签名
-                    edge = tuple(sorted((str(u), str(v))))
-                    if edge not in written_edges:
-                        f.write(f"{u},{v}\n")
-                        written_edges.add(edge)
+            for i in order:
+                r_i = rank[i]
+                u = ids[i]
+                # 每条无向边只从名次较小的端点写出，不会写两遍 1,2 和 2,1
+                for j in sorted(cg.neighbors(i), key=rank.__getitem__):
+                    if rank[j] >= r_i:
+                        f.write(f"{u},{ids[j]}\n")
     except Exception as e:
         import traceback
         traceback.print_exc()
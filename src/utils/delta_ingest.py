@@ -0,0 +1,206 @@
+﻿"""
+增量数据导入模块
+
+把"新增/删除"变更文件直接应用到内存中的 Graph 与 HashTable 上，无需重新读取两份全量文件。
+变更文件每行一条，空行与 # 注释行会被跳过：
+    1,2 或 +1,2            新增好友关系
+    -1,3                   解除好友关系
+    +@21,张三,编程;篮球     新增或更新用户档案
+    -@21                   注销用户 (连同其全部关系)
+
+整批变更先逐条校验 (用户是否存在只查哈希表，O(1))，全部合法后才开始修改，
+非法的变更文件不会留下应用了一半的数据。
+DeltaWatcher 记住追加写入文件已读取到的字节偏移，每次只解析新追加的完整行。
+"""
+
+import os
+
+from data_structure.user_record import UserRecord
+from utils.profiler import instrument
+
+
+def parse_delta_line(raw, line_no):
+    """
+    解析一行变更记录
+
+    Returns:
+        tuple | None: (操作, 参数...)；空行与注释行返回 None
+
+    Raises:
+        ValueError: 行格式错误
+    """
+    raw = raw.strip()
+    if not raw or raw.startswith("#"):
+        return None
+    sign = "+"
+    if raw[0] in "+-":
+        sign, raw = raw[0], raw[1:].strip()
+    if raw.startswith("@"):
+        if sign == "-":
+            uid = raw[1:].strip()
+            if not uid or "," in uid:
+                raise ValueError(f"注销用户格式错误(第{line_no}行): {raw}")
+            return ("remove_user", uid)
+        parts = raw[1:].split(",", 2)
+        if len(parts) < 2 or not parts[0].strip() or not parts[1].strip():
+            raise ValueError(f"用户档案格式错误(第{line_no}行): {raw}")
+        interests = parts[2].strip() if len(parts) == 3 else ""
+        return ("put_user", parts[0].strip(), parts[1].strip(), interests)
+
+    parts = raw.split(",")
+    if len(parts) != 2 or not parts[0].strip() or not parts[1].strip():
+        raise ValueError(f"好友关系格式错误(第{line_no}行): {raw}")
+    return ("add_edge" if sign == "+" else "remove_edge", parts[0].strip(), parts[1].strip())
+
+
+def read_delta(delta_path, offset=0, first_line=1):
+    """
+    从字节偏移 offset 开始读取变更文件中的完整行 (末尾尚未写完换行符的半行留待下次读取)
+
+    Returns:
+        tuple[list, int, int]: ([(行号, 操作)], 新的字节偏移, 下一行的行号)
+    """
+    with open(delta_path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    if end == 0:
+        return [], offset, first_line
+    text = data[:end].decode("utf-8")
+    if offset == 0 and text.startswith("\ufeff"):
+        text = text[1:]
+    ops = []
+    line_no = first_line
+    for line in text.splitlines():
+        op = parse_delta_line(line, line_no)
+        if op is not None:
+            ops.append((line_no, op))
+        line_no += 1
+    return ops, offset + end, line_no
+
+
+def _validate(ops, hash_table):
+    """
+    按顺序模拟整批变更，检查每条关系引用的用户在执行到该条时是否存在
+    """
+    added = set()
+    removed = set()
+
+    def exists(uid):
+        return uid in added or (uid not in removed and hash_table.get(uid) is not None)
+
+    for line_no, op in ops:
+        kind = op[0]
+        if kind == "put_user":
+            added.add(op[1])
+            removed.discard(op[1])
+        elif kind == "remove_user":
+            if not exists(op[1]):
+                raise ValueError(f"注销了不存在的用户(第{line_no}行): {op[1]}")
+            removed.add(op[1])
+            added.discard(op[1])
+        else:
+            missing = [uid for uid in op[1:] if not exists(uid)]
+            if missing:
+                raise ValueError(f"好友关系引用了不存在的用户(第{line_no}行): {','.join(missing)}")
+
+
+@instrument()
+def apply_delta(ops, hash_table, graph):
+    """
+    校验并应用一批变更；相邻的同类删除操作合并为一次批量删除
+
+    Args:
+        ops (list): read_delta 返回的 [(行号, 操作)]
+        hash_table (HashTable): 用户档案
+        graph (Graph): 好友关系图
+
+    Returns:
+        dict: 各类变更的实际生效数、受影响的用户ID集合 touched，以及档案是否变化 users_changed
+
+    Raises:
+        ValueError: 存在非法变更时整批拒绝，数据保持不变
+    """
+    _validate(ops, hash_table)
+    summary = {"add_edge": 0, "remove_edge": 0, "put_user": 0, "remove_user": 0,
+               "touched": set(), "users_changed": False}
+    touched = summary["touched"]
+    i = 0
+    while i < len(ops):
+        kind = ops[i][1][0]
+        j = i
+        while j < len(ops) and ops[j][1][0] == kind:
+            j += 1
+        run = [op for _, op in ops[i:j]]
+        if kind == "add_edge":
+            for _, u, v in run:
+                if not graph.has_edge(u, v):
+                    graph.add_edge(u, v)
+                    summary["add_edge"] += 1
+                    touched.update((u, v))
+        elif kind == "remove_edge":
+            removed = graph.remove_edges((u, v) for _, u, v in run)
+            summary["remove_edge"] += len(removed)
+            for u, v in removed:
+                touched.update((u, v))
+        elif kind == "put_user":
+            for _, uid, name, interests in run:
+                hash_table.put(uid, UserRecord(name, interests))
+                graph.add_node(uid)
+                touched.add(uid)
+            summary["put_user"] += len(run)
+            summary["users_changed"] = True
+        else:
+            removed = hash_table.remove_many(uid for _, uid in run)
+            former = graph.remove_nodes(uid for uid, _ in removed)
+            for uid, nbrs in former.items():
+                touched.add(uid)
+                touched.update(nbrs)
+            summary["remove_user"] += len(removed)
+            summary["users_changed"] = True
+        i = j
+    return summary
+
+
+class DeltaWatcher:
+    """
+    追加写入的变更文件监视器：记住已读取的字节偏移，poll() 只应用新追加的完整行
+
+    Attributes:
+        path (str): 变更文件路径
+        offset (int): 已处理到的字节偏移
+    """
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.offset = 0
+        self._next_line = 1
+        if not from_start and os.path.exists(path):
+            # 默认只处理开始监视之后追加的内容，已有内容不解析
+            with open(path, "rb") as f:
+                data = f.read()
+            self.offset = data.rfind(b"\n") + 1
+            self._next_line = data.count(b"\n", 0, self.offset) + 1
+
+    def poll(self, hash_table, graph):
+        """
+        读取并应用新追加的变更
+
+        Returns:
+            dict | None: apply_delta 的结果；没有新内容时返回 None
+
+        Raises:
+            ValueError: 新内容中存在非法变更 (偏移不前进，修正文件后可重试)
+        """
+        if not os.path.exists(self.path):
+            return None
+        if os.path.getsize(self.path) < self.offset:
+            # 文件被截断或轮转，从头开始
+            self.offset = 0
+            self._next_line = 1
+        ops, offset, next_line = read_delta(self.path, self.offset, self._next_line)
+        if offset == self.offset:
+            return None
+        summary = apply_delta(ops, hash_table, graph)
+        self.offset = offset
+        self._next_line = next_line
+        return summary
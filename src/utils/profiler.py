@@ -0,0 +1,196 @@
+﻿"""
+热点路径性能埋点模块
+
+提供可选开启的轻量级计时埋点：装饰器 instrument 与上下文管理器 timed_block
+记录调用次数、耗时直方图、最近一次耗时与净分配内存块数，并支持导出 JSON 统计或 cProfile 转储。
+
+默认关闭，关闭时每次调用只多一次布尔判断；可通过环境变量 SNS_PROFILE=1 或 enable() 开启。
+"""
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# 耗时直方图桶上界 (毫秒)，采用 1-2-5 递增序列，最后一桶收纳所有更慢的调用
+BUCKET_BOUNDS_MS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50,
+                    100, 200, 500, 1000, 2000, 5000]
+
+
+class OpStats:
+    """
+    单个埋点的统计累加器
+    """
+    __slots__ = ("calls", "total", "min", "max", "last", "alloc_blocks", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.last = 0.0
+        self.alloc_blocks = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def record(self, elapsed, blocks):
+        self.calls += 1
+        self.total += elapsed
+        self.last = elapsed
+        if elapsed < self.min:
+            self.min = elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.alloc_blocks += blocks
+        ms = elapsed * 1000
+        idx = 0
+        while idx < len(BUCKET_BOUNDS_MS) and ms > BUCKET_BOUNDS_MS[idx]:
+            idx += 1
+        self.buckets[idx] += 1
+
+    def to_dict(self):
+        hist = {}
+        for i, count in enumerate(self.buckets):
+            if count:
+                label = f"<={BUCKET_BOUNDS_MS[i]}ms" if i < len(BUCKET_BOUNDS_MS) else f">{BUCKET_BOUNDS_MS[-1]}ms"
+                hist[label] = count
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.calls, 3) if self.calls else 0.0,
+            "min_ms": round(self.min * 1000, 3) if self.calls else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": round(self.last * 1000, 3),
+            "alloc_blocks": self.alloc_blocks,
+            "histogram": hist,
+        }
+
+
+class Profiler:
+    """
+    全局埋点注册表 (线程安全)
+    """
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._cprofile = None
+
+    def enable(self, cprofile=False):
+        """
+        开启埋点采集
+
+        Args:
+            cprofile (bool): 是否同时开启 cProfile 全量函数级采样 (开销较大)
+        """
+        self.enabled = True
+        if cprofile and self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def disable(self):
+        self.enabled = False
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {}
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile = None
+
+    def record(self, name, elapsed, blocks=0):
+        with self._lock:
+            op = self.stats.get(name)
+            if op is None:
+                op = self.stats[name] = OpStats()
+            op.record(elapsed, blocks)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {埋点名: 统计字典}，按累计耗时降序排列
+        """
+        with self._lock:
+            items = [(name, op.to_dict()) for name, op in self.stats.items()]
+        items.sort(key=lambda kv: kv[1]["total_ms"], reverse=True)
+        return dict(items)
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "ops": self.snapshot()},
+                      f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+    def dump_cprofile(self, path):
+        """
+        将 cProfile 采样结果写出为 pstats 兼容文件，可用 snakeviz / pstats 分析
+
+        Returns:
+            bool: 未开启 cProfile 时返回 False
+        """
+        if self._cprofile is None:
+            return False
+        self._cprofile.dump_stats(path)
+        return True
+
+
+PROFILER = Profiler()
+if os.environ.get("SNS_PROFILE", "") not in ("", "0"):
+    PROFILER.enable(cprofile=os.environ.get("SNS_PROFILE") == "cprofile")
+
+
+def instrument(name=None):
+    """
+    函数埋点装饰器：采集开启时记录每次调用的耗时与净分配内存块数
+
+    Args:
+        name (str): 埋点名称，缺省使用函数名
+    """
+    def decorator(fn):
+        op_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            blocks0 = sys.getallocatedblocks()
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PROFILER.record(op_name, time.perf_counter() - t0,
+                                sys.getallocatedblocks() - blocks0)
+        return wrapper
+    return decorator
+
+
+class timed_block:
+    """
+    代码块埋点上下文管理器
+
+    用法:
+        with timed_block("rebuild_index"):
+            ...
+    """
+    __slots__ = ("name", "_t0", "_blocks0")
+
+    def __init__(self, name):
+        self.name = name
+        self._t0 = None
+
+    def __enter__(self):
+        if PROFILER.enabled:
+            self._blocks0 = sys.getallocatedblocks()
+            self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._t0 is not None:
+            PROFILER.record(self.name, time.perf_counter() - self._t0,
+                            sys.getallocatedblocks() - self._blocks0)
+            self._t0 = None
+        return False
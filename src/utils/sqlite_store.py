@@ -0,0 +1,286 @@
+﻿"""
+SQLite 存储后端模块
+
+CSV/TXT 持久化每次都要整表重写；本模块改用本地 SQLite 文件保存用户档案与好友关系：
+1. users 表以用户ID为主键，friendships 表每条无向边只存一行 (u < v)，两端均有索引
+2. WAL 日志模式：写入只追加日志，查询与写入互不阻塞，断电不丢已提交的数据
+3. 整库导入 (CSV/TXT 或内存结构) 用 executemany 分批写入，整体一个事务
+4. attach() 订阅哈希表与图谱的变更事件并记入待写日志，commit() 在一个事务内只写入变化的行，
+   保存代价与修改量成正比，而非与数据总量成正比
+可与原有的 CSV/TXT 格式互相导入导出。
+"""
+
+import os
+import sqlite3
+import threading
+
+from data_structure.user_record import UserRecord
+from utils.data_reader import iter_user_rows, iter_friend_pairs, save_all_data
+from utils.profiler import instrument
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id        TEXT PRIMARY KEY,
+    name      TEXT NOT NULL,
+    interests TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS friendships (
+    u TEXT NOT NULL,
+    v TEXT NOT NULL,
+    PRIMARY KEY (u, v)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS friendships_v ON friendships (v);
+"""
+
+# executemany 每批写入的行数
+BATCH_SIZE = 10000
+
+
+def _edge(u, v):
+    """无向边的规范形式：较小的ID在前，每条边只存一行"""
+    return (u, v) if u <= v else (v, u)
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SQLiteStore:
+    """
+    基于 SQLite 文件的用户档案与好友关系存储
+
+    Attributes:
+        path (str): 数据库文件路径
+        pending (int): 已记录但尚未提交的变更数
+    """
+    def __init__(self, path):
+        self.path = path
+        # 回写可能在后台线程中进行，连接允许跨线程使用，由 _lock 串行化
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # 变更回调 (写者线程) 与 commit (可能在后台线程) 交接待写日志时使用的锁
+        self._journal_lock = threading.Lock()
+        self._journal = []
+        self._hash_table = None
+        self._graph = None
+
+    def close(self):
+        self.detach()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def pending(self):
+        return len(self._journal)
+
+    def counts(self):
+        """
+        Returns:
+            tuple[int, int]: (用户数, 好友关系数)
+        """
+        with self._lock:
+            users = self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+            edges = self._conn.execute("SELECT COUNT(*) FROM friendships").fetchone()[0]
+        return users, edges
+
+    def _replace_all(self, users, edges):
+        """
+        在一个事务内清空两张表并分批写入全部行
+        """
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                cur.execute("DELETE FROM friendships")
+                cur.execute("DELETE FROM users")
+                for batch in _batches(users):
+                    cur.executemany("INSERT INTO users (id, name, interests) VALUES (?, ?, ?)", batch)
+                for batch in _batches(edges):
+                    cur.executemany("INSERT OR IGNORE INTO friendships (u, v) VALUES (?, ?)", batch)
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+    @instrument()
+    def import_files(self, user_path, friend_path):
+        """
+        从 CSV/TXT 数据文件整库导入 (覆盖库中原有数据)
+
+        Raises:
+            ValueError: 文件格式错误或关系引用了不存在的用户
+        """
+        try:
+            users = list(iter_user_rows(user_path))
+            known = {uid for uid, _, _ in users}
+
+            def edges():
+                for line_no, u, v in iter_friend_pairs(friend_path):
+                    if u not in known or v not in known:
+                        raise ValueError(f"好友关系引用了不存在的用户(第{line_no}行): {u},{v}")
+                    yield _edge(u, v)
+            self._replace_all(users, edges())
+        except (OSError, sqlite3.Error, ValueError) as e:
+            raise ValueError("数据库导入失败: " + str(e))
+
+    @instrument()
+    def save_all(self, hash_table, graph):
+        """
+        把内存中的哈希表与图谱 (或其快照) 整库写入 (覆盖库中原有数据)
+
+        待写日志不会被清空：日志中的变更均为幂等的 upsert / delete，随后 commit() 按序重放，
+        结果仍与内存中的最新状态一致 (快照之后发生的修改也不会丢失)。
+        """
+        users = ((uid, info["name"], info["interests"])
+                 for uid, info in ((uid, hash_table.get(uid)) for uid in hash_table.get_all_keys()))
+        edges = (_edge(u, v) for u, nbrs in graph.adjacency_items() for v in nbrs if u <= v)
+        self._replace_all(users, edges)
+
+    @instrument()
+    def load(self, hash_table, graph):
+        """
+        把库中的全部用户与好友关系装载到内存结构中
+
+        Raises:
+            ValueError: 数据库读取失败
+        """
+        try:
+            with self._lock:
+                for uid, name, interests in self._conn.execute("SELECT id, name, interests FROM users"):
+                    hash_table.put(uid, UserRecord(name, interests))
+                    graph.add_node(uid)
+                for u, v in self._conn.execute("SELECT u, v FROM friendships"):
+                    graph.add_edge(u, v)
+        except sqlite3.Error as e:
+            raise ValueError("数据库读取失败: " + str(e))
+
+    @instrument()
+    def export_files(self, user_path, friend_path):
+        """
+        导出为 CSV/TXT 数据文件，格式与 save_all_data 的输出完全一致
+        """
+        from data_structure.hash_table import HashTable
+        from data_structure.adjacency_list import Graph
+        hash_table = HashTable()
+        graph = Graph()
+        self.load(hash_table, graph)
+        save_all_data(user_path, friend_path, hash_table, graph)
+
+    # ---------- 增量回写 ----------
+
+    def attach(self, hash_table, graph):
+        """
+        订阅哈希表与图谱的变更事件，此后的修改记入待写日志，由 commit() 统一写入
+        """
+        self.detach()
+        self._hash_table = hash_table
+        self._graph = graph
+        hash_table.add_listener(self.on_profile_change)
+        graph.add_listener(self.on_graph_change)
+        return self
+
+    def detach(self):
+        if self._hash_table is not None:
+            self._hash_table.remove_listener(self.on_profile_change)
+            self._graph.remove_listener(self.on_graph_change)
+            self._hash_table = None
+            self._graph = None
+
+    def _record(self, op):
+        with self._journal_lock:
+            self._journal.append(op)
+
+    def on_profile_change(self, event, key, old_value, new_value):
+        if event == "remove":
+            self._record(("delete_user", key))
+        else:
+            self._record(("put_user", key, new_value["name"], new_value["interests"]))
+
+    def on_graph_change(self, event, u, v):
+        if event == "remove_node":
+            self._record(("delete_node", u))
+        elif event == "add_edge":
+            self._record(("add_edge",) + _edge(u, v))
+        else:
+            self._record(("remove_edge",) + _edge(u, v))
+
+    @instrument()
+    def commit(self):
+        """
+        在一个事务内按顺序写入待写日志中的全部变更 (upsert / delete)，失败时整体回滚并保留日志
+
+        Returns:
+            int: 写入的变更数
+        """
+        with self._lock:
+            with self._journal_lock:
+                journal, self._journal = self._journal, []
+            if not journal:
+                return 0
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                for op in journal:
+                    kind = op[0]
+                    if kind == "put_user":
+                        cur.execute(
+                            "INSERT INTO users (id, name, interests) VALUES (?, ?, ?) "
+                            "ON CONFLICT (id) DO UPDATE SET name = excluded.name, interests = excluded.interests",
+                            op[1:])
+                    elif kind == "add_edge":
+                        cur.execute("INSERT OR IGNORE INTO friendships (u, v) VALUES (?, ?)", op[1:])
+                    elif kind == "remove_edge":
+                        cur.execute("DELETE FROM friendships WHERE u = ? AND v = ?", op[1:])
+                    else:
+                        # 删除用户或节点：连同其全部关系一并删除
+                        cur.execute("DELETE FROM friendships WHERE u = ? OR v = ?", (op[1], op[1]))
+                        if kind == "delete_user":
+                            cur.execute("DELETE FROM users WHERE id = ?", (op[1],))
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                # 失败的变更放回日志开头，下次提交时重试
+                with self._journal_lock:
+                    self._journal = journal + self._journal
+                raise
+            return len(journal)
+
+
+def is_database_path(path):
+    """
+    按扩展名判断是否为 SQLite 数据库文件
+    """
+    return os.path.splitext(path)[1].lower() in (".db", ".sqlite", ".sqlite3")
+
+
+def open_store(db_path, user_path=None, friend_path=None):
+    """
+    打开数据库；库为空且给出了 CSV/TXT 数据文件时先整库导入
+
+    Returns:
+        SQLiteStore: 已打开的存储
+    """
+    store = SQLiteStore(db_path)
+    try:
+        if user_path and friend_path and store.counts()[0] == 0:
+            store.import_files(user_path, friend_path)
+    except Exception:
+        store.close()
+        raise
+    return store